@@ -10,9 +10,21 @@ from io import BytesIO
 from chainlit.input_widget import Select, Slider, Switch
 import sys
 import wave
+import time
+from types import SimpleNamespace
 
 # Import the new message processing function
-from lib.message_processor import process_message_for_tts
+from lib.message_processor import process_message_for_tts, fast_path_report
+from lib.filler_bank import FillerBank, bank_fingerprint
+from lib.voice_warmup import VoiceWarmup
+from lib.loop_monitor import LoopMonitor
+from lib.llm_coalescer import LLMCoalescer
+from lib.session_memory import SessionMemory
+from lib.tts_tuner import TTSTuner
+from lib.speculative import Speculator
+from lib import turn_recorder as tr
+from lib.shared_cache import SharedCache, cache_key
+from lib.llm_stream import TokenBatcher, ThinkSplitter
 
 def raw_pcm_to_wav(pcm_bytes, sample_rate=16000, channels=1, sample_width=2):
     """Convert raw PCM bytes to WAV bytes."""
@@ -27,7 +39,7 @@ def raw_pcm_to_wav(pcm_bytes, sample_rate=16000, channels=1, sample_width=2):
 load_dotenv()
 
 # Load config.json
-config_path = 'config.json'
+config_path = os.getenv("CHAINLOOT_CONFIG", 'config.json')
 
 try:
     with open(config_path, 'r') as f:
@@ -40,11 +52,40 @@ LM_STUDIO_URL = config["lm_studio_base_url"].rstrip('/v1')
 CHATTERBOX_URL = config["tts_base_url"]
 TTS_WEBUI_URL = config["tts_webui_url"]
 
+# Set by launcher.py when running as one of several workers
+worker_id = os.getenv("CHAINLOOT_WORKER")
+
+# Discovery results, TTS audio and classifier results shared between workers
+shared_cache = None
+if config.get("shared_cache_enabled", True):
+    shared_cache = SharedCache(
+        config.get("shared_cache_path", "cache/shared.sqlite3"),
+        max_bytes=config.get("shared_cache_max_mb", 256) * 2**20
+    )
+discovery_ttl_s = config.get("discovery_ttl_s", 300)
+tts_cache_ttl_s = config.get("tts_cache_ttl_s", 86400)
+
+def cached_discovery(name, fetch, refresh=False):
+    """Run a discovery `fetch()`, sharing its result between workers for discovery_ttl_s seconds."""
+    if shared_cache is None:
+        return fetch()
+    if not refresh:
+        cached = shared_cache.get_json("discovery", name)
+        if cached is not None:
+            return cached
+    result = fetch()
+    shared_cache.set_json("discovery", name, result, ttl_s=discovery_ttl_s)
+    return result
+
+def get_json(url):
+    response = requests.get(url)
+    response.raise_for_status()
+    return response.json()
+
 # Fetch available voices for Chatterbox dynamically from API
 try:
-    voices_response = requests.get(f"{CHATTERBOX_URL}/v1/audio/voices/chatterbox")
-    voices_response.raise_for_status()
-    voices_data = voices_response.json()
+    voices_url = f"{CHATTERBOX_URL}/v1/audio/voices/chatterbox"
+    voices_data = cached_discovery(f"voices:{voices_url}", lambda: get_json(voices_url))
     available_voices = [v["value"] for v in voices_data["voices"]]
     if config["tts_voice"] not in available_voices:
         print(f"Warning: Config voice {config['tts_voice']} not in available voices. Using first available.")
@@ -59,11 +100,10 @@ tts_voice = config["tts_voice"]
 print(f"Using TTS voice: {tts_voice}")
 
 # Fetch available LLM models dynamically
-def fetch_available_models():
+def fetch_available_models(refresh=False):
     try:
-        response = requests.get(f"{LM_STUDIO_URL}/api/v0/models")
-        response.raise_for_status()
-        models_data = response.json()["data"]
+        models_url = f"{LM_STUDIO_URL}/api/v0/models"
+        models_data = cached_discovery(f"models:{models_url}", lambda: get_json(models_url)["data"], refresh)
         # Filter for chat/LLM models, exclude STT/Whisper models
         return [m["id"] for m in models_data if m["type"] == "llm" and "whisper" not in m["id"].lower()]
     except Exception as e:
@@ -75,6 +115,25 @@ api_key = os.getenv("LM_API_KEY", config["api_key"])
 client = AsyncOpenAI(base_url=f"{LM_STUDIO_URL}/v1", api_key=api_key)
 tts_client = AsyncOpenAI(base_url=f"{CHATTERBOX_URL}/v1", api_key=api_key)
 
+# Identical temperature-0 requests share one in-flight call and a short-TTL cache
+llm_coalescer = LLMCoalescer(
+    ttl_s=config.get("llm_cache_ttl_s", 30),
+    enabled=config.get("llm_coalesce_enabled", True)
+)
+
+# Diagnostic mode: event-loop lag histogram and blocking-call detector
+loop_monitor = None
+if config.get("loop_monitor_enabled", False):
+    loop_export_path = config.get("loop_monitor_export_path", "cache/loop_lag.json")
+    if worker_id:
+        # One export per worker, e.g. cache/loop_lag.1.json
+        root, ext = os.path.splitext(loop_export_path)
+        loop_export_path = f"{root}.{worker_id}{ext}"
+    loop_monitor = LoopMonitor(
+        threshold_ms=config.get("loop_monitor_threshold_ms", 100),
+        export_path=loop_export_path
+    )
+
 # Sync client for STT transcription
 stt_client = OpenAI(base_url=f"{CHATTERBOX_URL}/v1", api_key=api_key)
 # Instrument the OpenAI client
@@ -90,6 +149,13 @@ default_tts_model = config["tts_model_name"]
 default_tts_response_format = config["tts_response_format"]
 default_tts_stream = config["tts_stream"]
 
+# Short replies skip chunking and the classifier model when the lexicon says neutral
+sentiment_options = {
+    "fast_path_max_words": config.get("sentiment_fast_path_max_words", 30),
+    "audit_rate": config.get("sentiment_audit_rate", 0.1),
+    "cache": shared_cache,
+}
+
 # Prompt catalog
 prompt_catalog = {
     "AI": "You are a 3-P-O, a helpful AI assistant. Your responses are concise and brief. No more than 2 sentences per message.",
@@ -100,14 +166,398 @@ prompt_catalog = {
 # Character profiles for chat participants
 character_options = ["AI", "Yoda", "Stark"]
 
+# Precomputed clips played while the real reply is generated, per character
+filler_catalog = {
+    "AI": {
+        "greeting": ["Hello! How can I help?"],
+        "filler": ["One moment.", "Let me see.", "Hmm."]
+    },
+    "Yoda": {
+        "greeting": ["Greetings, young one."],
+        "filler": ["Hmm.", "Hmm, think I must.", "Yes, hmm."]
+    },
+    "Stark": {
+        "greeting": ["Hey. What do you need?"],
+        "filler": ["Uh-huh.", "Give me a sec.", "Hmm."]
+    }
+}
+
 settings = {
     "temperature": default_llm_temp,
     "max_tokens": default_max_tokens,
 }
 
+def build_tts_params(tts_exaggeration):
+    """Build the Chatterbox `params` payload sent alongside each TTS request."""
+    return {
+        "exaggeration": tts_exaggeration,
+        "cfg_weight": config["tts_cfg_weight"],
+        "temperature": config["tts_temperature"],
+        "device": config["tts_device"],
+        "dtype": config["tts_dtype"],
+        "seed": config["tts_seed"],
+        "chunked": config["tts_chunked"],
+        "use_compilation": config["tts_use_compilation"],
+        "max_new_tokens": config["tts_max_new_tokens"],
+        "max_cache_len": config["tts_max_cache_len"],
+        "desired_length": config["tts_desired_length"],
+        "max_length": config["tts_max_length"],
+        "halve_first_chunk": True,
+        "cpu_offload": False,
+        "cache_voice": False,
+        "tokens_per_slice": None,
+        "remove_milliseconds": None,
+        "remove_milliseconds_start": None,
+        "chunk_overlap_method": "undefined"
+    }
+
+async def synthesize_speech(text, voice, speed, params_dict, use_cache=True, tune=True):
+    """
+    Stream speech for `text` from the TTS server and return the full audio bytes.
+
+    `use_cache=False` always reaches the TTS server, e.g. for voice warm-up, whose point is the request itself.
+    `tune=False` keeps background synthesis (warm-up, filler clips) out of the adaptive chunking controller
+    and the cold/warm latency stats; the warm-up records its own cold sample.
+    """
+    # Any worker may already have synthesized the same text with the same settings
+    tts_key = None
+    if shared_cache and use_cache:
+        tts_key = cache_key(default_tts_model, default_tts_response_format, text, voice, speed,
+                            {k: v for k, v in params_dict.items() if k != "cache_voice"})
+        cached = await shared_cache.aget("tts", tts_key)
+        if cached is not None:
+            logger.info(f"TTS cache hit: voice={voice} for {len(text)} chars")
+            return cached
+    # Reuse the server-side speaker conditioning once the voice has been warmed up
+    warm = voice_warmup.is_warm(voice)
+    base_params = params_dict
+    if warm:
+        params_dict = {**params_dict, "cache_voice": True}
+    decision = None
+    if tts_tuner and tune:
+        decision = tts_tuner.begin(text)
+        params_dict = {**params_dict, **decision["params"]}
+    start = time.perf_counter()
+    ttfb = None
+    buffer = b""
+    try:
+        async with tts_client.audio.speech.with_streaming_response.create(
+            model=default_tts_model,
+            input=text,
+            voice=voice,
+            response_format=default_tts_response_format,
+            speed=speed,
+            extra_body={"params": params_dict}
+        ) as response:
+            async for chunk in response.iter_bytes():
+                if ttfb is None:
+                    ttfb = time.perf_counter() - start
+                buffer += chunk
+    except Exception:
+        # The TTS server may have restarted and lost its cached conditioning; warm the voice again
+        if warm:
+            voice_warmup.invalidate(voice)
+            voice_warmup.warm(voice, speed, base_params)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        if decision:
+            # A failed request only releases its queue slot; it is not a latency sample
+            tts_tuner.finish(decision, ttfb if buffer else None, elapsed)
+    if tune:
+        voice_warmup.record(voice, elapsed, warm)
+    logger.info(f"TTS latency: voice={voice} warm={warm} ttfb={ttfb or 0:.2f}s total={elapsed:.2f}s for {len(text)} chars")
+    if tts_key and buffer:
+        await shared_cache.aset("tts", tts_key, buffer, ttl_s=tts_cache_ttl_s)
+    return buffer
+
+# Adaptive chunking: config values are the upper bounds, tuned per request from measured TTFB
+tts_tuner = None
+if config.get("tts_tuning_enabled", True):
+    tts_tuner = TTSTuner(
+        build_tts_params(default_tts_exaggeration),
+        target_ttfb_s=config.get("tts_target_ttfb_s", 1.0),
+        min_desired_length=config.get("tts_min_desired_length", 40),
+        deep_queue=config.get("tts_deep_queue", 2)
+    )
+
+# Voice warm-up: one background synthesis per voice so later requests can set cache_voice
+voice_warmup = VoiceWarmup(synthesize_speech)
+
+def schedule_voice_warmup():
+    """Warm the current session's voice in the background if it is still cold."""
+    selected_voice = cl.user_session.get("selected_voice", default_tts_voice)
+    tts_speed = cl.user_session.get("tts_speed", default_tts_speed)
+    tts_exaggeration = cl.user_session.get("tts_exaggeration", default_tts_exaggeration)
+    voice_warmup.warm(selected_voice, tts_speed, build_tts_params(tts_exaggeration))
+
+# Filler bank: synthesized in the background, played while LLM + TTS run
+filler_enabled = config.get("filler_enabled", True)
+filler_bank = FillerBank(
+    config.get("filler_bank_dir", "cache/filler_bank"),
+    synthesize_speech,
+    file_ext=default_tts_response_format,
+    max_banks=config.get("filler_max_banks", 8)
+)
+
+# Per-session memory accounting and idle-session eviction
+session_memory = SessionMemory(
+    max_recording_bytes=config.get("max_recording_bytes", 60 * 24000 * 2),
+    idle_s=config.get("session_idle_s", 600)
+)
+
+# user_session keys holding heavy state that idle sessions can drop
+HEAVY_SESSION_KEYS = ["audio_buffer", "audio_buffer_bytes", "filler_msg", "speculation", "partial_stt_task", "partial_stt_bytes"]
+
+def evict_session_state(session_id):
+    """Drop the heavy user_session state of an idle session."""
+    # cl.user_session only reaches the current session; go through the per-session store
+    from chainlit.user_session import user_sessions
+    state = user_sessions.get(session_id)
+    if state:
+        # A pending speculation or partial transcription would otherwise keep running for nobody
+        partial_task = state.get("partial_stt_task")
+        if partial_task and not partial_task.done():
+            partial_task.cancel()
+        if speculator:
+            speculator.discard(state.get("speculation"))
+        for key in HEAVY_SESSION_KEYS:
+            state.pop(key, None)
+
+def build_reply_audio(buffer):
+    """Wrap TTS reply bytes in a cl.Audio; Chainlit writes them to its session files on send and keeps only the path."""
+    return cl.Audio(name="response_audio.wav", content=buffer, mime="audio/wav", auto_play=True)
+
+def build_llm_request(user_text):
+    """Build the chat completion kwargs for `user_text` from the session's model, prompt and sampler settings."""
+    # Use latest models from session if available, else global
+    session_models = cl.user_session.get("available_models")
+    current_models = session_models if session_models else available_models
+    selected_model = cl.user_session.get("selected_model") or current_models[0]
+    system_prompt = cl.user_session.get("system_prompt", prompt_catalog["AI"])
+    reasoning_enabled = cl.user_session.get("reasoning_enabled", False)
+    if reasoning_enabled:
+        # Tagged so the reasoning can be shown apart from the reply and kept out of TTS
+        system_prompt += " Think step by step inside <think></think> tags before responding."
+    return {
+        "model": selected_model,
+        "messages": [
+            {"content": system_prompt, "role": "system"},
+            {"content": user_text, "role": "user"}
+        ],
+        "temperature": cl.user_session.get("llm_temp", default_llm_temp),
+        "max_tokens": cl.user_session.get("max_tokens", default_max_tokens),
+    }
+
+# Token streaming: socket writes are batched by time and size
+llm_stream_enabled = config.get("llm_stream_enabled", True)
+llm_stream_flush_s = config.get("llm_stream_flush_ms", 50) / 1000
+llm_stream_flush_chars = config.get("llm_stream_flush_chars", 64)
+
+async def stream_llm_reply(llm_request, character, timings, response=None, start=None):
+    """
+    Render the LLM reply into a `[{character}]: ` message as it is generated.
+
+    Reasoning (`reasoning_content` deltas or <think> blocks) is streamed into a separate
+    "Reasoning" step when reasoning is enabled and dropped otherwise; it never reaches TTS.
+    Identical deterministic requests still go through the coalescer: the first caller streams,
+    the others render its finished reply at once. With streaming disabled the request is a plain
+    coalesced completion, and an already completed `response` (e.g. a kept speculation) is
+    rendered as is; pass the `start` of the LLM stage it was awaited in, so its wait counts.
+
+    Returns:
+        (message, reply text without reasoning). Sets timings["llm_ttft_s"]: time from `start`
+        (default: now) to the first token for the caller that streamed, to the shared reply for the others.
+    """
+    reasoning_enabled = cl.user_session.get("reasoning_enabled", False)
+    msg = cl.Message(content=f"[{character}]: ")
+    answer_batcher = TokenBatcher(msg.stream_token, llm_stream_flush_s, llm_stream_flush_chars)
+    splitter = ThinkSplitter()
+    answer_parts = []
+    reasoning = {"step": None, "batcher": None}
+    if start is None:
+        start = time.perf_counter()
+
+    async def render(reasoning_text, answer_text):
+        if reasoning_text and reasoning_enabled:
+            if reasoning["step"] is None:
+                reasoning["step"] = cl.Step(name="Reasoning", type="llm")
+                await reasoning["step"].send()
+                reasoning["batcher"] = TokenBatcher(reasoning["step"].stream_token, llm_stream_flush_s, llm_stream_flush_chars)
+            await reasoning["batcher"].add(reasoning_text)
+        if answer_text:
+            answer_parts.append(answer_text)
+            await answer_batcher.add(answer_text)
+
+    streamed = False
+
+    async def stream_completion(**request):
+        """Streams into this caller's message; returns a completion-shaped result for the coalescer to share."""
+        nonlocal streamed
+        streamed = True
+        content_parts, reasoning_parts = [], []
+        stream = await client.chat.completions.create(**request, stream=True)
+        try:
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta
+                # LM Studio puts reasoning in reasoning_content when its reasoning parser is on
+                reasoning_text = getattr(delta, "reasoning_content", None) or ""
+                content = delta.content or ""
+                if (reasoning_text or content) and "llm_ttft_s" not in timings:
+                    timings["llm_ttft_s"] = time.perf_counter() - start
+                content_parts.append(content)
+                reasoning_parts.append(reasoning_text)
+                split_reasoning, answer_text = splitter.feed(content)
+                await render(reasoning_text + split_reasoning, answer_text)
+        finally:
+            # Closes the HTTP response even when rendering fails or the turn is cancelled.
+            # cl.instrument_openai() hands back a plain async generator (aclose), not an AsyncStream (close)
+            close = getattr(stream, "aclose", None) or getattr(stream, "close", None)
+            if close:
+                await close()
+        message = SimpleNamespace(content="".join(content_parts), reasoning_content="".join(reasoning_parts))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+
+    if response is None:
+        create_fn = stream_completion if llm_stream_enabled else client.chat.completions.create
+        response = await llm_coalescer.create(create_fn, **llm_request)
+    if not streamed:
+        # Coalesced, cached, non-streaming or speculative: the whole reply is already here
+        timings["llm_ttft_s"] = time.perf_counter() - start
+        message = response.choices[0].message
+        await render(getattr(message, "reasoning_content", None) or "", "")
+        await render(*splitter.feed(message.content or ""))
+    await render(*splitter.close())
+
+    await answer_batcher.close()
+    total_s = time.perf_counter() - start
+    # A stream without any content or reasoning delta (an empty reply) never set a first-token time
+    timings.setdefault("llm_ttft_s", total_s)
+    instrumentation = {"llm_ttft_s": round(timings["llm_ttft_s"], 3), "llm_total_s": round(total_s, 3), "streamed": streamed}
+    if reasoning["batcher"]:
+        await reasoning["batcher"].close()
+        reasoning["step"].metadata = instrumentation
+        await reasoning["step"].update()
+    # Shown with the message in the UI's debug view and stored with the thread
+    msg.metadata = instrumentation
+    await msg.send()
+    logger.info(f"LLM latency: ttft={timings['llm_ttft_s']:.2f}s total={total_s:.2f}s streamed={streamed}, "
+                f"{answer_batcher.flushes} socket writes for {answer_batcher.deltas} deltas")
+    return msg, "".join(answer_parts).strip()
+
+# Speculative mode: partial STT during recording starts a cancellable LLM request early
+speculator = None
+if config.get("speculative_llm_enabled", False):
+    speculator = Speculator(min_new_audio_s=config.get("speculative_min_audio_s", 1.5))
+
+def take_speculation():
+    """Detach the session's pending speculation and stop any partial transcription still running."""
+    partial_task = cl.user_session.get("partial_stt_task")
+    if partial_task and not partial_task.done():
+        partial_task.cancel()
+    cl.user_session.set("partial_stt_task", None)
+    speculation = cl.user_session.get("speculation")
+    cl.user_session.set("speculation", None)
+    return speculation
+
+async def speculate_on_partial_audio(pcm_bytes):
+    """Transcribe the audio received so far and restart the speculative LLM request if the text changed."""
+    speculator.stats["partial_stt_calls"] += 1
+    wav_bytes = raw_pcm_to_wav(pcm_bytes, sample_rate=24000)
+    try:
+        # The STT client is sync; keep it off the event loop while chunks are still streaming in
+        transcription = await asyncio.to_thread(
+            stt_client.audio.transcriptions.create,
+            model=config.get("whisper_model", "openai/whisper-small.en"),
+            file=("partial_audio.wav", BytesIO(wav_bytes)),
+        )
+    except Exception as e:
+        logger.warning(f"Speculative LLM: partial STT failed: {e}")
+        return
+    partial_text = transcription.text.strip()
+    speculation = cl.user_session.get("speculation")
+    if not partial_text or speculator.matches(speculation, partial_text):
+        return
+    speculator.discard(speculation)
+    cl.user_session.set("speculation", speculator.start(partial_text, build_llm_request(partial_text), client.chat.completions.create))
+    logger.info(f"Speculative LLM: started on partial transcript '{partial_text[:50]}...'")
+
+# Opt-in turn recorder for offline replay (docs/testing/replay_turns.py)
+turn_recorder = None
+if config.get("turn_recorder_enabled", False):
+    turn_recorder = tr.TurnRecorder(config.get("turn_recorder_dir", "cache/turns"))
+
+def begin_turn(mode):
+    """Start recording a turn for the current session, or return None when the recorder is off."""
+    if not turn_recorder:
+        return None
+    return turn_recorder.begin(cl.context.session.id, {"mode": mode, "character": cl.user_session.get("character")})
+
+def current_filler_settings():
+    """Return the (voice, character, speed, params) the session's filler bank is keyed on."""
+    selected_voice = cl.user_session.get("selected_voice", default_tts_voice)
+    character = cl.user_session.get("character", character_options[0])
+    tts_speed = cl.user_session.get("tts_speed", default_tts_speed)
+    tts_exaggeration = cl.user_session.get("tts_exaggeration", default_tts_exaggeration)
+    return selected_voice, character, tts_speed, build_tts_params(tts_exaggeration)
+
+async def ensure_filler_bank(voice, character, speed, params_dict):
+    """Synthesize the filler bank for these settings; errors are logged, never raised."""
+    try:
+        await filler_bank.ensure(voice, character, speed, params_dict, filler_catalog.get(character, filler_catalog["AI"]))
+    except Exception as e:
+        logger.error(f"Failed to build filler bank for {character}/{voice}: {e}")
+
+def schedule_filler_bank():
+    """Kick off background synthesis of the current session's filler bank."""
+    if not filler_enabled:
+        return
+    asyncio.create_task(ensure_filler_bank(*current_filler_settings()))
+
+async def start_filler(kind):
+    """Play a precomputed clip for the current session while the real reply is generated."""
+    if not filler_enabled:
+        return
+    if kind == "filler":
+        # A clip left over from an earlier turn must not be orphaned by the new one
+        await stop_filler()
+    voice, character, speed, params_dict = current_filler_settings()
+    clip_path = filler_bank.pick(bank_fingerprint(voice, character, speed, params_dict), kind)
+    if clip_path is None:
+        # Bank missing or invalidated by a settings change; build it for next time
+        schedule_filler_bank()
+        return
+    filler_msg = cl.Message(
+        content="",
+        author=character,
+        elements=[cl.Audio(name=f"{kind}.{default_tts_response_format}", path=clip_path, mime="audio/wav", auto_play=True)]
+    )
+    await filler_msg.send()
+    # Greetings stay in the chat; fillers are removed once the real audio arrives
+    if kind == "filler":
+        cl.user_session.set("filler_msg", filler_msg)
+
+async def stop_filler():
+    """Remove the session's filler clip, if any, so it stops before the real audio plays."""
+    filler_msg = cl.user_session.get("filler_msg")
+    if filler_msg is None:
+        return
+    cl.user_session.set("filler_msg", None)
+    try:
+        await filler_msg.remove()
+    except Exception as e:
+        logger.warning(f"Failed to remove filler clip: {e}")
+
 @cl.on_chat_start
 async def on_chat_start():
     logger.info(f"AUDIO DIAG: Chat start - Session ID: {cl.context.session.id}, STT client base: {stt_client.base_url}")
+    if loop_monitor:
+        # Needs the running loop, so it starts with the first session
+        loop_monitor.start()
+    session_memory.start_evictor(evict_session_state)
+    session_memory.touch(cl.context.session.id)
     selected_model = available_models[0]
     cl.user_session.set("selected_model", selected_model)
     
@@ -198,6 +648,8 @@ async def on_chat_start():
 
     await cl.Message(content=f"Model: {selected_model}  Voice: {selected_voice}").send()
     await cl.Message(content="Voice mode ready! Click the microphone icon, record your speech, and send – it will be transcribed automatically.").send()
+    schedule_voice_warmup()
+    await start_filler("greeting")
 
     # Settings are now managed via user_session; UI actions removed due to API incompatibility
 
@@ -213,40 +665,47 @@ async def on_settings_update(settings):
     cl.user_session.set("tts_exaggeration", settings["tts_exaggeration"])
     cl.user_session.set("reasoning_enabled", settings["reasoning_enabled"])
 
-    # Persist settings to config.json
-    try:
-        with open(config_path, 'r') as f:
-            current_config = json.load(f)
-
-        # Update settings that are directly mapped to config.json
-        if "voice" in settings:
-            current_config["tts_voice"] = settings["voice"]
-        if "model" in settings:
-            # LLM model selection is handled by cl.user_session.set("selected_model", settings["model"])
-            # and is not directly persisted to config.json in this manner.
-            pass # No direct persistence to config.json for LLM model ID
-        if "voice" in settings:
-            # Persist the selected TTS voice
-            current_config["tts_voice"] = settings["voice"]
-        if "llm_temp" in settings:
-            current_config["lm_studio_temperature"] = settings["llm_temp"] # Assuming this key exists or should be added
-        if "max_tokens" in settings:
-            current_config["max_tokens"] = settings["max_tokens"]
-        if "tts_speed" in settings:
-            current_config["tts_speed"] = settings["tts_speed"]
-        if "tts_exaggeration" in settings:
-            current_config["tts_exaggeration"] = settings["tts_exaggeration"]
+    # Voice, character or TTS params may have changed; the old bank no longer matches
+    schedule_voice_warmup()
+    schedule_filler_bank()
+
+    # Persist settings to config.json; test configs (docs/testing/mock_config.json) turn this off
+    if config.get("persist_settings", True):
+        try:
+            with open(config_path, 'r') as f:
+                current_config = json.load(f)
+
+            # Update settings that are directly mapped to config.json
+            if "voice" in settings:
+                current_config["tts_voice"] = settings["voice"]
+            if "model" in settings:
+                # LLM model selection is handled by cl.user_session.set("selected_model", settings["model"])
+                # and is not directly persisted to config.json in this manner.
+                pass # No direct persistence to config.json for LLM model ID
+            if "voice" in settings:
+                # Persist the selected TTS voice
+                current_config["tts_voice"] = settings["voice"]
+            if "llm_temp" in settings:
+                current_config["lm_studio_temperature"] = settings["llm_temp"] # Assuming this key exists or should be added
+            if "max_tokens" in settings:
+                current_config["max_tokens"] = settings["max_tokens"]
+            if "tts_speed" in settings:
+                current_config["tts_speed"] = settings["tts_speed"]
+            if "tts_exaggeration" in settings:
+                current_config["tts_exaggeration"] = settings["tts_exaggeration"]
         
-        # Write the updated config back to the file
-        with open(config_path, 'w') as f:
-            json.dump(current_config, f, indent=4)
+            # Write the updated config back to the file; replace atomically since other workers read it too
+            tmp_path = f"{config_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(current_config, f, indent=4)
+            os.replace(tmp_path, config_path)
             
-    except Exception as e:
-        logger.error(f"Failed to persist settings to {config_path}: {e}")
+        except Exception as e:
+            logger.error(f"Failed to persist settings to {config_path}: {e}")
 
     if settings["model_refresh"] == "Refresh Now":
         try:
-            updated_models = fetch_available_models()
+            updated_models = fetch_available_models(refresh=True)
             old_models = cl.user_session.get("available_models", available_models)
             new_models = [m for m in updated_models if m not in old_models]
             cl.user_session.set("available_models", updated_models)
@@ -333,43 +792,12 @@ async def on_message(message: cl.Message):
 
                 # Display transcribed text as user message
                 user_msg = await cl.Message(content=user_text).send()
+                await start_filler("filler")
 
-                # Reuse logic for LLM and TTS
-                session_models = cl.user_session.get("available_models")
-                current_models = session_models if session_models else available_models
-                selected_model = cl.user_session.get("selected_model") or current_models[0]
-                system_prompt = cl.user_session.get("system_prompt", prompt_catalog["AI"])
-                reasoning_enabled = cl.user_session.get("reasoning_enabled", False)
-                if reasoning_enabled:
-                    system_prompt += " Think step by step before responding."
-                llm_temp = cl.user_session.get("llm_temp", default_llm_temp)
-                max_tokens = cl.user_session.get("max_tokens", default_max_tokens)
-
-                # 2. LLM Inference
-                response = await client.chat.completions.create(
-                    model=selected_model,
-                    messages=[
-                        {"content": system_prompt, "role": "system"},
-                        {"content": user_text, "role": "user"}
-                    ],
-                    temperature=llm_temp,
-                    max_tokens=max_tokens,
-                )
-                full_response = response.choices[0].message.content
-
-                # --- Sentiment Analysis Integration ---
-                # Process the full response for sentiment analysis and debugging.
-                # The process_message_for_tts function will handle chunking, scrubbing,
-                # sentiment classification, and printing debug statements.
-                # For now, we are not directly using the sentiment to influence TTS,
-                # but the debug statements will be printed.
-                # Future work could involve using processed_message_data to influence TTS.
-                processed_message_data = process_message_for_tts(full_response)
-                # --- End Sentiment Analysis Integration ---
-            
+                # 2. LLM Inference, streamed into the reply message
                 character = cl.user_session.get("character", character_options[0])
-                text_msg = await cl.Message(content=f"[{character}]: {full_response}").send()
-            
+                text_msg, full_response = await stream_llm_reply(build_llm_request(user_text), character, {})
+
                 # --- Sentiment Analysis Integration ---
                 # Process the full response for sentiment analysis and debugging.
                 # The process_message_for_tts function will handle chunking, scrubbing,
@@ -377,7 +805,8 @@ async def on_message(message: cl.Message):
                 # For now, we are not directly using the sentiment to influence TTS,
                 # but the debug statements will be printed.
                 # Future work could involve using processed_message_data to influence TTS.
-                processed_message_data = process_message_for_tts(full_response)
+                # Off the event loop: runs the classifier and the shared cache's SQLite lookups
+                processed_message_data = await asyncio.to_thread(process_message_for_tts, full_response, **sentiment_options)
                 # --- End Sentiment Analysis Integration ---
             
                 # 3. Text-to-Speech
@@ -385,50 +814,16 @@ async def on_message(message: cl.Message):
                 tts_speed = cl.user_session.get("tts_speed", default_tts_speed)
                 tts_exaggeration = cl.user_session.get("tts_exaggeration", default_tts_exaggeration)
             
-                params_dict = {
-                    "exaggeration": tts_exaggeration,
-                    "cfg_weight": config["tts_cfg_weight"],
-                    "temperature": config["tts_temperature"],
-                    "device": config["tts_device"],
-                    "dtype": config["tts_dtype"],
-                    "seed": config["tts_seed"],
-                    "chunked": config["tts_chunked"],
-                    "use_compilation": config["tts_use_compilation"],
-                    "max_new_tokens": config["tts_max_new_tokens"],
-                    "max_cache_len": config["tts_max_cache_len"],
-                    "desired_length": config["tts_desired_length"],
-                    "max_length": config["tts_max_length"],
-                    "halve_first_chunk": True,
-                    "cpu_offload": False,
-                    "cache_voice": False,
-                    "tokens_per_slice": None,
-                    "remove_milliseconds": None,
-                    "remove_milliseconds_start": None,
-                    "chunk_overlap_method": "undefined"
-                }
-            
-                buffer = b""
-                async with tts_client.audio.speech.with_streaming_response.create(
-                    model=default_tts_model,
-                    input=full_response, # Keep original full_response for TTS input for now
-                    voice=selected_voice,
-                    response_format=default_tts_response_format,
-                    speed=tts_speed,
-                    extra_body={"params": params_dict}
-                ) as response:
-                    async for chunk in response.iter_bytes():
-                        buffer += chunk
-
-                tts_audio = cl.Audio(
-                    name="response_audio.wav",
-                    content=buffer,
-                    mime="audio/wav",
-                    auto_play=True
-                )
+                params_dict = build_tts_params(tts_exaggeration)
+                buffer = await synthesize_speech(full_response, selected_voice, tts_speed, params_dict)
+                await stop_filler()
+
+                tts_audio = build_reply_audio(buffer)
                 await tts_audio.send(for_id=text_msg.id)
 
             except Exception as e:
                 logger.error(f"AUDIO DIAG: STT or processing error: {str(e)}")
+                await stop_filler()
                 await cl.Message(content=f"Error processing audio: {str(e)}").send()
             return
 
@@ -438,88 +833,52 @@ async def on_message(message: cl.Message):
         return
 
     logger.info(f"Processing text message: {message.content[:100]}...")
+    session_memory.touch(cl.context.session.id)
+    await start_filler("filler")
     
-    # Use latest models from session if available, else global
-    session_models = cl.user_session.get("available_models")
-    current_models = session_models if session_models else available_models
-    selected_model = cl.user_session.get("selected_model")
-    if not selected_model:
-        selected_model = current_models[0]
-    
-    system_prompt = cl.user_session.get("system_prompt", prompt_catalog["AI"])
-    reasoning_enabled = cl.user_session.get("reasoning_enabled", False)
-    if reasoning_enabled:
-        system_prompt += " Think step by step before responding."
-    
-    llm_temp = cl.user_session.get("llm_temp", default_llm_temp)
-    max_tokens = cl.user_session.get("max_tokens", default_max_tokens)
-    
-    response = await client.chat.completions.create(
-        model=selected_model,
-        messages=[
-            {
-                "content": system_prompt,
-                "role": "system"
-            },
-            {
-                "content": message.content,
-                "role": "user"
-            }
-        ],
-        temperature=llm_temp,
-        max_tokens=max_tokens,
-    )
-    text_content = response.choices[0].message.content
-    
+    turn = begin_turn("text")
+    timings = {}
+    try:
+        await respond_to_text(message.content, turn, timings)
+    except Exception as e:
+        logger.error(f"Text reply failed: {e}")
+        timings["error"] = str(e)
+        await cl.Message(content=f"Error generating a reply: {str(e)}").send()
+    finally:
+        # Never leave the filler clip in the chat, whatever failed
+        await stop_filler()
+        if turn:
+            await turn.finish({**timings, "total_s": turn.elapsed()})
+
+async def respond_to_text(user_text, turn, timings):
+    """LLM + TTS for a typed message, recording each stage into `turn` when the recorder is on."""
+    llm_request = build_llm_request(user_text)
+    if turn:
+        turn.add(tr.SEGMENT_USER_TEXT, {"text": user_text})
+        turn.add(tr.SEGMENT_LLM_REQUEST, llm_request)
     character = cl.user_session.get("character", character_options[0])
-    # Send text response with character context if needed
-    text_msg = await cl.Message(content=f"[{character}]: {text_content}").send()
+    stage_start = time.perf_counter()
+    # Send text response with character context, streamed as it is generated
+    text_msg, text_content = await stream_llm_reply(llm_request, character, timings)
+    timings["llm_s"] = time.perf_counter() - stage_start
+    if turn:
+        turn.add(tr.SEGMENT_LLM_RESPONSE, {"content": text_content, "elapsed": timings["llm_s"],
+                                           "ttft_s": timings.get("llm_ttft_s"), "speculative": False})
     
     # Generate TTS audio streaming
     selected_voice = cl.user_session.get("selected_voice", default_tts_voice)
     tts_speed = cl.user_session.get("tts_speed", default_tts_speed)
     tts_exaggeration = cl.user_session.get("tts_exaggeration", default_tts_exaggeration)
 
-    params_dict = {
-        "exaggeration": tts_exaggeration,
-        "cfg_weight": config["tts_cfg_weight"],
-        "temperature": config["tts_temperature"],
-        "device": config["tts_device"],
-        "dtype": config["tts_dtype"],
-        "seed": config["tts_seed"],
-        "chunked": config["tts_chunked"],
-        "use_compilation": config["tts_use_compilation"],
-        "max_new_tokens": config["tts_max_new_tokens"],
-        "max_cache_len": config["tts_max_cache_len"],
-        "desired_length": config["tts_desired_length"],
-        "max_length": config["tts_max_length"],
-        "halve_first_chunk": True,
-        "cpu_offload": False,
-        "cache_voice": False,
-        "tokens_per_slice": None,
-        "remove_milliseconds": None,
-        "remove_milliseconds_start": None,
-        "chunk_overlap_method": "undefined"
-    }
+    params_dict = build_tts_params(tts_exaggeration)
+    stage_start = time.perf_counter()
+    buffer = await synthesize_speech(text_content, selected_voice, tts_speed, params_dict)
+    timings["tts_s"] = time.perf_counter() - stage_start
+    if turn:
+        turn.add(tr.SEGMENT_TTS_AUDIO, buffer)
+    await stop_filler()
 
-    buffer = b""
-    async with tts_client.audio.speech.with_streaming_response.create(
-        model=default_tts_model,
-        input=text_content,
-        voice=selected_voice,
-        response_format=default_tts_response_format,
-        speed=tts_speed,
-        extra_body={"params": params_dict}
-    ) as response:
-        async for chunk in response.iter_bytes():
-            buffer += chunk
-
-    audio = cl.Audio(
-        name="response_audio.wav",
-        content=buffer,
-        mime="audio/wav",
-        auto_play=True
-    )
+    audio = build_reply_audio(buffer)
     await audio.send(for_id=text_msg.id)
 
 @cl.on_audio_chunk
@@ -529,14 +888,47 @@ async def on_audio_chunk(chunk):
         # Initialize audio buffer for new recording
         buffer = []
         cl.user_session.set("audio_buffer", buffer)
+        cl.user_session.set("audio_buffer_bytes", 0)
+        if speculator:
+            speculator.discard(take_speculation())
+            cl.user_session.set("partial_stt_bytes", 0)
         logger.info(f"AUDIO DIAG: on_audio_chunk START - Session ID: {cl.context.session.id}")
         return
     
     # Append audio chunk to buffer
     audio_buffer = cl.user_session.get("audio_buffer")
     if audio_buffer is not None:
+        buffered_bytes = cl.user_session.get("audio_buffer_bytes", 0)
+        if buffered_bytes + len(chunk.data) > session_memory.max_recording_bytes:
+            # Cap retained mic audio; the rest of an overlong recording is dropped
+            if buffered_bytes <= session_memory.max_recording_bytes:
+                logger.warning(f"AUDIO DIAG: Recording exceeds {session_memory.max_recording_bytes} bytes, dropping further chunks")
+                cl.user_session.set("audio_buffer_bytes", buffered_bytes + len(chunk.data))
+            return
         audio_buffer.append(chunk.data)
         cl.user_session.set("audio_buffer", audio_buffer)
+        cl.user_session.set("audio_buffer_bytes", buffered_bytes + len(chunk.data))
+        session_memory.account(cl.context.session.id, "audio_buffer", buffered_bytes + len(chunk.data))
+
+        # Speculative mode: transcribe what we have so far once enough new audio arrived
+        if speculator:
+            partial_task = cl.user_session.get("partial_stt_task")
+            partial_bytes = cl.user_session.get("partial_stt_bytes", 0)
+            if (partial_task is None or partial_task.done()) and buffered_bytes + len(chunk.data) - partial_bytes >= speculator.min_new_audio_bytes:
+                cl.user_session.set("partial_stt_bytes", buffered_bytes + len(chunk.data))
+                cl.user_session.set("partial_stt_task", asyncio.create_task(speculate_on_partial_audio(b"".join(audio_buffer))))
+
+@cl.on_chat_end
+async def on_chat_end():
+    if speculator:
+        speculator.discard(take_speculation())
+    session_memory.release(cl.context.session.id)
+    logger.info(f"Sentiment fast path: {fast_path_report()}")
+    if tts_tuner:
+        logger.info(f"TTS tuning: {tts_tuner.report()}")
+    logger.info(f"Voice warm-up: {voice_warmup.stats()}")
+    if shared_cache:
+        logger.info(f"Shared cache: {await asyncio.to_thread(shared_cache.report)}")
 
 @cl.on_audio_start
 async def on_audio_start():
@@ -557,8 +949,18 @@ async def on_audio_end():
     
     # Clear buffer
     cl.user_session.set("audio_buffer", None)
+    cl.user_session.set("audio_buffer_bytes", 0)
+    session_memory.account(cl.context.session.id, "audio_buffer", 0)
+    speculation = take_speculation() if speculator else None
+    turn = begin_turn("audio")
+    timings = {}
+    if turn:
+        turn.add(tr.SEGMENT_MIC_PCM, audio_bytes)
     
     try:
+        # Filler covers the whole turn, STT included
+        await start_filler("filler")
+
         # 1. Speech-to-Text
         logger.info(f"AUDIO DIAG: Calling STT API - Model: {config.get('whisper_model', 'openai/whisper-tiny.en')}, URL: {stt_client.base_url}, Bytes: {len(audio_bytes)}")
         
@@ -566,42 +968,55 @@ async def on_audio_end():
         wav_bytes = raw_pcm_to_wav(audio_bytes, sample_rate=24000)
         logger.info(f"AUDIO DIAG: Converted {len(audio_bytes)} PCM bytes to {len(wav_bytes)} WAV bytes")
         
-        transcription = stt_client.audio.transcriptions.create(
+        stage_start = time.perf_counter()
+        # Off the event loop, so the filler clip goes out while Whisper runs
+        transcription = await asyncio.to_thread(
+            stt_client.audio.transcriptions.create,
             model=config.get("whisper_model", "openai/whisper-small.en"),
             file=("recorded_audio.wav", BytesIO(wav_bytes)),
         )
         user_text = transcription.text.strip()
+        timings["stt_s"] = time.perf_counter() - stage_start
         logger.info(f"AUDIO DIAG: STT response - Text length: {len(user_text)}, Text: '{user_text[:50]}...'")
+        if turn:
+            turn.add(tr.SEGMENT_STT_TEXT, {"text": user_text, "elapsed": timings["stt_s"]})
         
         if not user_text:
+            if speculator:
+                speculator.discard(speculation)
+            await stop_filler()
             await cl.Message(content="No speech detected in audio.").send()
             return
 
         # Display transcribed text as user message
         await cl.Message(content=user_text, author="You").send()
 
-        # Reuse logic for LLM and TTS
-        session_models = cl.user_session.get("available_models")
-        current_models = session_models if session_models else available_models
-        selected_model = cl.user_session.get("selected_model") or current_models[0]
-        system_prompt = cl.user_session.get("system_prompt", prompt_catalog["AI"])
-        reasoning_enabled = cl.user_session.get("reasoning_enabled", False)
-        if reasoning_enabled:
-            system_prompt += " Think step by step before responding."
-        llm_temp = cl.user_session.get("llm_temp", default_llm_temp)
-        max_tokens = cl.user_session.get("max_tokens", default_max_tokens)
-
-        # 2. LLM Inference
-        response = await client.chat.completions.create(
-            model=selected_model,
-            messages=[
-                {"content": system_prompt, "role": "system"},
-                {"content": user_text, "role": "user"}
-            ],
-            temperature=llm_temp,
-            max_tokens=max_tokens,
-        )
-        full_response = response.choices[0].message.content
+        # 2. LLM Inference, reusing the speculative request if it was started from the same transcript
+        llm_request = build_llm_request(user_text)
+        if turn:
+            turn.add(tr.SEGMENT_LLM_REQUEST, llm_request)
+        stage_start = time.perf_counter()
+        speculative_task = None
+        response = None
+        if speculator:
+            speculative_task = speculator.resolve(speculation, user_text, llm_request)
+            kept = speculation
+            speculation = None
+            logger.info(f"Speculative LLM: {'kept' if speculative_task else 'not used'} - {speculator.report()}")
+            if speculative_task:
+                try:
+                    response = await speculative_task
+                except Exception as e:
+                    # Failed after resolve() checked it: count it as discarded and ask again
+                    logger.warning(f"Speculative LLM request failed, retrying normally: {e}")
+                    speculator.fail(kept)
+                    speculative_task = None
+        character = cl.user_session.get("character", character_options[0])
+        text_msg, full_response = await stream_llm_reply(llm_request, character, timings, response, start=stage_start)
+        timings["llm_s"] = time.perf_counter() - stage_start
+        if turn:
+            turn.add(tr.SEGMENT_LLM_RESPONSE, {"content": full_response, "elapsed": timings["llm_s"],
+                                               "ttft_s": timings.get("llm_ttft_s"), "speculative": speculative_task is not None})
 
         # --- Sentiment Analysis Integration ---
         # Process the full response for sentiment analysis and debugging.
@@ -610,60 +1025,34 @@ async def on_audio_end():
         # For now, we are not directly using the sentiment to influence TTS,
         # but the debug statements will be printed.
         # Future work could involve using processed_message_data to influence TTS.
-        processed_message_data = process_message_for_tts(full_response)
+        # Off the event loop: runs the classifier and the shared cache's SQLite lookups
+        processed_message_data = await asyncio.to_thread(process_message_for_tts, full_response, **sentiment_options)
         # --- End Sentiment Analysis Integration ---
 
-        character = cl.user_session.get("character", character_options[0])
-        text_msg = await cl.Message(content=f"[{character}]: {full_response}").send()
-
         # 3. Text-to-Speech
         selected_voice = cl.user_session.get("selected_voice", default_tts_voice)
         tts_speed = cl.user_session.get("tts_speed", default_tts_speed)
         tts_exaggeration = cl.user_session.get("tts_exaggeration", default_tts_exaggeration)
 
-        params_dict = {
-            "exaggeration": tts_exaggeration,
-            "cfg_weight": config["tts_cfg_weight"],
-            "temperature": config["tts_temperature"],
-            "device": config["tts_device"],
-            "dtype": config["tts_dtype"],
-            "seed": config["tts_seed"],
-            "chunked": config["tts_chunked"],
-            "use_compilation": config["tts_use_compilation"],
-            "max_new_tokens": config["tts_max_new_tokens"],
-            "max_cache_len": config["tts_max_cache_len"],
-            "desired_length": config["tts_desired_length"],
-            "max_length": config["tts_max_length"],
-            "halve_first_chunk": True,
-            "cpu_offload": False,
-            "cache_voice": False,
-            "tokens_per_slice": None,
-            "remove_milliseconds": None,
-            "remove_milliseconds_start": None,
-            "chunk_overlap_method": "undefined"
-        }
-
-        buffer = b""
-        async with tts_client.audio.speech.with_streaming_response.create(
-            model=default_tts_model,
-            input=full_response,
-            voice=selected_voice,
-            response_format=default_tts_response_format,
-            speed=tts_speed,
-            extra_body={"params": params_dict}
-        ) as response:
-            async for chunk in response.iter_bytes():
-                buffer += chunk
+        params_dict = build_tts_params(tts_exaggeration)
+        stage_start = time.perf_counter()
+        buffer = await synthesize_speech(full_response, selected_voice, tts_speed, params_dict)
+        timings["tts_s"] = time.perf_counter() - stage_start
+        if turn:
+            turn.add(tr.SEGMENT_TTS_AUDIO, buffer)
+        await stop_filler()
 
-        tts_audio = cl.Audio(
-            name="response_audio.wav",
-            content=buffer,
-            mime="audio/wav",
-            auto_play=True
-        )
+        tts_audio = build_reply_audio(buffer)
         await tts_audio.send(for_id=text_msg.id)
 
     except Exception as e:
         logger.error(f"AUDIO DIAG: STT or processing error: {str(e)}")
+        timings["error"] = str(e)
+        if speculator:
+            speculator.discard(speculation)
+        await stop_filler()
         await cl.Message(content=f"Error processing audio: {str(e)}").send()
+    finally:
+        if turn:
+            await turn.finish({**timings, "total_s": turn.elapsed()})
     return True
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Multi-session load generator for the Chainlit websocket (socket.io) protocol.
+
+Connects N simulated clients to a running `chainlit run app.py` server, and
+for each one runs a number of turns: either a text message (`client_message`)
+or a recording streamed through `audio_start` / `audio_chunk` / `audio_end`
+at realtime pace. A turn ends when the reply audio element arrives.
+
+Reports sessions/sec, per-session server memory, generator event-loop lag and
+latency percentiles for session start, first reply text (the first streamed
+tokens) and reply audio. With `loop_monitor_enabled` in the server config,
+--server-lag-file adds the server's own loop lag and the handlers that
+blocked it.
+
+Run it against the mock backends so only app.py is being measured:
+    python docs/testing/mock_backends.py --port 7999 &
+    CHAINLOOT_CONFIG=docs/testing/mock_config.json chainlit run app.py --headless --port 8000 &
+    python docs/testing/load_test.py --sessions 50 --mode audio --server-pid $! --server-lag-file cache/loop_lag.json
+
+Needs the socket.io asyncio client: pip install "python-socketio[asyncio_client]"
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+import wave
+from datetime import datetime, timezone
+
+try:
+    import socketio
+except ImportError:
+    print("python-socketio is required: pip install \"python-socketio[asyncio_client]\"")
+    sys.exit(1)
+
+DEFAULT_WAV = os.path.join(os.path.dirname(__file__), "stives.wav")
+# Must match [features.audio] sample_rate in .chainlit/config.toml
+SAMPLE_RATE = 24000
+CHUNK_SECONDS = 0.1
+
+
+def percentile(values: list[float], pct: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def read_rss_bytes(pid: int):
+    """Reads the resident set size of `pid` from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def load_pcm_chunks(wav_path: str) -> list[bytes]:
+    """Splits a 16-bit mono WAV into realtime-sized raw PCM chunks."""
+    with wave.open(wav_path, "rb") as wav_file:
+        if wav_file.getframerate() != SAMPLE_RATE:
+            print(f"Warning: {wav_path} is {wav_file.getframerate()} Hz, the server assumes {SAMPLE_RATE} Hz")
+        pcm = wav_file.readframes(wav_file.getnframes())
+    chunk_bytes = int(SAMPLE_RATE * CHUNK_SECONDS) * 2
+    return [pcm[i:i + chunk_bytes] for i in range(0, len(pcm), chunk_bytes)]
+
+
+class Stats:
+    def __init__(self):
+        self.session_start = []
+        self.first_text = []
+        self.reply_audio = []
+        self.errors = 0
+        self.sessions_ready = 0
+        self.turns_done = 0
+
+
+class SimulatedClient:
+    """One simulated browser tab: a socket.io connection plus a Chainlit session."""
+
+    def __init__(self, args, stats: Stats, pcm_chunks: list[bytes]):
+        self.args = args
+        self.stats = stats
+        self.pcm_chunks = pcm_chunks
+        self.session_id = str(uuid.uuid4())
+        self.thread_id = str(uuid.uuid4())
+        self.sio = socketio.AsyncClient(reconnection=False)
+        self.ready = asyncio.Event()
+        self.reply_text = asyncio.Event()
+        self.reply_audio = asyncio.Event()
+        self.sio.on("new_message", self._on_message)
+        # Streamed replies show up with the first batch of tokens
+        self.sio.on("stream_start", self._on_message)
+        self.sio.on("element", self._on_element)
+
+    async def _on_message(self, payload):
+        output = payload.get("output") or ""
+        if self.args.ready_text in output:
+            self.ready.set()
+        elif payload.get("type") == "assistant_message" and output and payload.get("name") != "You":
+            # on_audio_end echoes the transcript as a "You" message; skip it
+            self.reply_text.set()
+
+    async def _on_element(self, payload):
+        if (payload.get("name") or "").startswith(self.args.reply_element):
+            self.reply_audio.set()
+
+    async def connect(self):
+        start = time.perf_counter()
+        await self.sio.connect(
+            self.args.url,
+            socketio_path="/ws/socket.io",
+            transports=["websocket"],
+            auth={
+                "clientType": "webapp",
+                "sessionId": self.session_id,
+                "threadId": self.thread_id,
+                "userEnv": "{}",
+                "chatProfile": None,
+            },
+        )
+        # Triggers on_chat_start on the server
+        await self.sio.emit("connection_successful")
+        await asyncio.wait_for(self.ready.wait(), self.args.timeout)
+        self.stats.session_start.append(time.perf_counter() - start)
+        self.stats.sessions_ready += 1
+
+    async def send_text(self, text: str):
+        await self.sio.emit("client_message", {
+            "message": {
+                "id": str(uuid.uuid4()),
+                "threadId": self.thread_id,
+                "name": "User",
+                "type": "user_message",
+                "output": text,
+                "createdAt": datetime.now(timezone.utc).isoformat(),
+                "metadata": {},
+            },
+            "fileReferences": None,
+        })
+
+    async def send_audio(self):
+        await self.sio.emit("audio_start")
+        started = time.perf_counter()
+        for i, pcm in enumerate(self.pcm_chunks):
+            await self.sio.emit("audio_chunk", {
+                "isStart": i == 0,
+                "mimeType": "pcm16",
+                "elapsedTime": (time.perf_counter() - started) * 1000,
+                "data": pcm,
+            })
+            # Realtime pace: one chunk per CHUNK_SECONDS of audio
+            await asyncio.sleep(CHUNK_SECONDS / self.args.speedup)
+        await self.sio.emit("audio_end")
+
+    async def run_turn(self):
+        self.reply_text.clear()
+        self.reply_audio.clear()
+        if self.args.mode == "audio":
+            await self.send_audio()
+        else:
+            await self.send_text(self.args.text)
+        # Latency is measured from the end of user input, like a user would perceive it
+        start = time.perf_counter()
+        await asyncio.wait_for(self.reply_text.wait(), self.args.timeout)
+        self.stats.first_text.append(time.perf_counter() - start)
+        await asyncio.wait_for(self.reply_audio.wait(), self.args.timeout)
+        self.stats.reply_audio.append(time.perf_counter() - start)
+        self.stats.turns_done += 1
+
+    async def run(self):
+        try:
+            await self.connect()
+            for _ in range(self.args.turns):
+                await self.run_turn()
+                await asyncio.sleep(self.args.think_time)
+        except Exception as e:
+            self.stats.errors += 1
+            print(f"Session {self.session_id[:8]} failed: {type(e).__name__}: {e}")
+        finally:
+            await self.sio.disconnect()
+
+
+def read_server_lag(path: str) -> dict:
+    """Pulls the headline numbers out of the server's loop monitor export (lib/loop_monitor.py)."""
+    try:
+        with open(path) as f:
+            export = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"Warning: Could not read server lag file {path}: {e}")
+        return {}
+    handlers = {}
+    for event in export.get("blocking_events", []):
+        handlers[event["handler"]] = handlers.get(event["handler"], 0) + 1
+    return {
+        "server_loop_lag_p50_ms": export.get("p50_ms"),
+        "server_loop_lag_p99_ms": export.get("p99_ms"),
+        "server_loop_lag_max_ms": export.get("max_ms"),
+        "server_blocking_events": sum(handlers.values()),
+        "server_blocking_handlers": handlers,
+    }
+
+
+async def sample_loop_lag(lags: list[float], interval: float = 0.05):
+    """Measures how late this process's own event loop wakes up, to rule out the generator as the bottleneck."""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def main_async(args):
+    stats = Stats()
+    pcm_chunks = load_pcm_chunks(args.wav) if args.mode == "audio" else []
+    lags = []
+    lag_task = asyncio.create_task(sample_loop_lag(lags))
+
+    rss_before = read_rss_bytes(args.server_pid) if args.server_pid else None
+    clients = [SimulatedClient(args, stats, pcm_chunks) for _ in range(args.sessions)]
+
+    start = time.perf_counter()
+    tasks = []
+    for client in clients:
+        tasks.append(asyncio.create_task(client.run()))
+        await asyncio.sleep(1 / args.ramp)
+    # Sample server memory once every session has started
+    while stats.sessions_ready + stats.errors < args.sessions and not all(t.done() for t in tasks):
+        await asyncio.sleep(0.1)
+    rss_peak = read_rss_bytes(args.server_pid) if args.server_pid else None
+    ready_elapsed = time.perf_counter() - start
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    lag_task.cancel()
+
+    report = {
+        "sessions": args.sessions,
+        "sessions_ready": stats.sessions_ready,
+        "errors": stats.errors,
+        "turns_done": stats.turns_done,
+        "elapsed_s": elapsed,
+        "sessions_per_s": stats.sessions_ready / ready_elapsed if ready_elapsed else None,
+        "turns_per_s": stats.turns_done / elapsed if elapsed else None,
+        "generator_loop_lag_p99_ms": (percentile(lags, 99) or 0) * 1000,
+    }
+    if rss_before is not None and rss_peak is not None and stats.sessions_ready:
+        report["server_rss_mb"] = rss_peak / 2**20
+        report["server_rss_per_session_kb"] = (rss_peak - rss_before) / stats.sessions_ready / 1024
+    for name, values in (("session_start", stats.session_start), ("first_text", stats.first_text), ("reply_audio", stats.reply_audio)):
+        for pct in (50, 90, 99):
+            value = percentile(values, pct)
+            report[f"{name}_p{pct}_ms"] = value * 1000 if value is not None else None
+
+    if args.server_lag_file:
+        report.update(read_server_lag(args.server_lag_file))
+
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print("\n--- Load test report ---")
+        for key, value in report.items():
+            print(f"{key:32} {value:.2f}" if isinstance(value, float) else f"{key:32} {value}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chainlit websocket load generator for app.py")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Chainlit server URL")
+    parser.add_argument("--sessions", type=int, default=10, help="Number of simulated clients")
+    parser.add_argument("--ramp", type=float, default=5.0, help="New sessions started per second")
+    parser.add_argument("--turns", type=int, default=3, help="Turns per session")
+    parser.add_argument("--think-time", type=float, default=1.0, help="Seconds between turns")
+    parser.add_argument("--mode", choices=["text", "audio"], default="text")
+    parser.add_argument("--text", default="What is the Force?", help="Message sent in text mode")
+    parser.add_argument("--wav", default=DEFAULT_WAV, help="16-bit mono WAV streamed in audio mode")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Stream audio faster than realtime")
+    parser.add_argument("--ready-text", default="Voice mode ready", help="Message marking on_chat_start as done")
+    parser.add_argument("--reply-element", default="response_audio", help="Name prefix of the reply audio element")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for each reply")
+    parser.add_argument("--server-pid", type=int, help="PID of the chainlit process, for memory per session")
+    parser.add_argument("--server-lag-file", help="Loop monitor export of the server, e.g. cache/loop_lag.json")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Mock LM Studio + Chatterbox/TTS-WebUI backends for load testing app.py.
+
+Serves just enough of each API for the voice pipeline to run end to end:
+
+| endpoint                            | mock behaviour                               |
+|-------------------------------------|----------------------------------------------|
+| GET  /api/v0/models                 | one "mock-llm" model                         |
+| POST /v1/chat/completions           | canned reply after --llm-delay; with "stream" |
+|                                     | one SSE chunk per word every --token-delay   |
+| GET  /v1/audio/voices/chatterbox    | one "voices/mock.wav" voice                  |
+| POST /v1/audio/speech               | silent WAV sized to the input after --tts-delay |
+| POST /v1/audio/transcriptions       | canned transcript after --stt-delay          |
+
+Usage:
+    python docs/testing/mock_backends.py --port 7999
+    CHAINLOOT_CONFIG=docs/testing/mock_config.json chainlit run app.py --headless
+"""
+import argparse
+import json
+import time
+import wave
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+
+MOCK_REPLY = "Hmm. Patience you must have, young one."
+MOCK_TRANSCRIPT = "As I was going to St. Ives, I met a man with seven wives."
+SAMPLE_RATE = 24000
+# Roughly how much speech Chatterbox produces per input character
+SECONDS_PER_CHAR = 0.06
+
+
+def silent_wav(seconds: float, sample_rate: int = SAMPLE_RATE) -> bytes:
+    """Builds a mono 16-bit WAV of silence."""
+    wav_buffer = BytesIO()
+    with wave.open(wav_buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return wav_buffer.getvalue()
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    delays = {"llm": 0.5, "llm_token": 0.02, "tts": 1.0, "stt": 0.3}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _read_body(self) -> bytes:
+        # Cached so subclasses can inspect the request and still fall back to the mock
+        if not hasattr(self, "_body"):
+            length = int(self.headers.get("Content-Length", 0))
+            self._body = self.rfile.read(length) if length else b""
+        return self._body
+
+    def _send(self, body: bytes, content_type: str = "application/json", status: int = 200):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: dict):
+        self._send(json.dumps(payload).encode("utf-8"))
+
+    def do_GET(self):
+        if self.path.startswith("/api/v0/models"):
+            self._send_json({"data": [{"id": "mock-llm", "type": "llm"}]})
+        elif self.path.startswith("/v1/audio/voices"):
+            self._send_json({"voices": [{"value": "voices/mock.wav", "label": "mock"}]})
+        else:
+            self._send(b"{}", status=404)
+
+    def _send_completion(self, request: dict, content: str, completion_id: str = "chatcmpl-mock", token_delay: float = None):
+        """Answers a chat completion with `content`, as SSE chunks when the request asks to stream."""
+        if token_delay is None:
+            token_delay = self.delays["llm_token"]
+        model = request.get("model", "mock-llm")
+        if not request.get("stream"):
+            self._send_json({
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            })
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            if i:
+                time.sleep(token_delay)
+            self._send_chunk(completion_id, model, {"content": word if i == 0 else " " + word}, None)
+        self._send_chunk(completion_id, model, {}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def _send_chunk(self, completion_id: str, model: str, delta: dict, finish_reason):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+        self.wfile.flush()
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path.startswith("/v1/chat/completions"):
+            time.sleep(self.delays["llm"])
+            self._send_completion(json.loads(body or b"{}"), MOCK_REPLY)
+        elif self.path.startswith("/v1/audio/speech"):
+            time.sleep(self.delays["tts"])
+            request = json.loads(body or b"{}")
+            self._send(silent_wav(len(request.get("input", "")) * SECONDS_PER_CHAR), content_type="audio/wav")
+        elif self.path.startswith("/v1/audio/transcriptions"):
+            time.sleep(self.delays["stt"])
+            self._send_json({"text": MOCK_TRANSCRIPT})
+        else:
+            self._send(b"{}", status=404)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LM Studio and Chatterbox backends")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7999)
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="Seconds per chat completion (to first token when streamed)")
+    parser.add_argument("--token-delay", type=float, default=0.02, help="Seconds between streamed words")
+    parser.add_argument("--tts-delay", type=float, default=1.0, help="Seconds per speech request")
+    parser.add_argument("--stt-delay", type=float, default=0.3, help="Seconds per transcription")
+    args = parser.parse_args()
+
+    MockHandler.delays = {"llm": args.llm_delay, "llm_token": args.token_delay, "tts": args.tts_delay, "stt": args.stt_delay}
+    server = ThreadingHTTPServer((args.host, args.port), MockHandler)
+    print(f"Mock backends listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+"""
+Replays recorded turns (lib/turn_recorder.py) through app.py as a regression benchmark.
+
+Enable `turn_recorder_enabled` in config.json to capture real traffic into
+cache/turns/<session>.turns. This script then:
+
+1. serves a replay backend on --backend-port that answers STT, LLM and TTS
+   requests with the recorded transcripts, replies and audio, after the
+   recorded backend latency (divided by --speed);
+2. drives a running app.py over the Chainlit socket protocol (see
+   load_test.py), re-sending each recorded mic recording at realtime / --speed
+   or each typed message;
+3. reports recorded vs. replayed turn latency, so a slower app.py shows up
+   even though the backends behave exactly as they did in production.
+
+app.py must run without result caching: with the shared TTS cache or the LLM
+result cache on, a second replay (or a repeated user text) is answered from
+cache and never waits for the recorded backend latency. --write-config writes
+a copy of mock_config.json with both caches and speculative requests off.
+
+Usage:
+    python docs/testing/replay_turns.py --write-config cache/replay_config.json
+    CHAINLOOT_CONFIG=cache/replay_config.json chainlit run app.py --headless --port 8000 &
+    python docs/testing/replay_turns.py cache/turns/ --speed 2
+"""
+import argparse
+import asyncio
+import glob
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+import wave
+from contextlib import ExitStack
+from io import BytesIO
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from lib.turn_recorder import TurnReader
+from load_test import CHUNK_SECONDS, SAMPLE_RATE, SimulatedClient, Stats, percentile
+from mock_backends import MockHandler
+
+MOCK_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "mock_config.json")
+
+
+class ReplayHandler(MockHandler):
+    """Mock backend answering with recorded responses; unknown requests fall back to the plain mock."""
+
+    speed = 1.0
+    # sha1 of the recorded mic PCM -> recorded STT answer, so concurrent sessions get their own transcript
+    stt_answers = {}
+    llm_replies = {}
+    tts_audio = {}
+
+    def _delay(self, seconds: float):
+        time.sleep(seconds / self.speed)
+
+    def do_POST(self):
+        if self.path.startswith("/v1/audio/transcriptions"):
+            recorded = self.stt_answers.get(pcm_digest_from_upload(self._read_body()))
+            if recorded is not None:
+                self._delay(recorded["elapsed"])
+                return self._send_json({"text": recorded["text"]})
+        elif self.path.startswith("/v1/chat/completions"):
+            body = self._read_body()
+            request = json.loads(body or b"{}")
+            user_text = next((m["content"] for m in reversed(request.get("messages", [])) if m.get("role") == "user"), "")
+            recorded = self.llm_replies.get(user_text)
+            if recorded is not None:
+                ttft = recorded.get("ttft_s") if request.get("stream") else None
+                if ttft is None:
+                    self._delay(recorded["elapsed"])
+                    return self._send_completion(request, recorded["content"], "chatcmpl-replay", token_delay=0.0)
+                # Streamed: first token at the recorded time, the rest spread over the remaining time
+                self._delay(ttft)
+                words = max(1, len(recorded["content"].split(" ")) - 1)
+                token_delay = max(0.0, recorded["elapsed"] - ttft) / words / self.speed
+                return self._send_completion(request, recorded["content"], "chatcmpl-replay", token_delay=token_delay)
+        elif self.path.startswith("/v1/audio/speech"):
+            body = self._read_body()
+            request = json.loads(body or b"{}")
+            recorded = self.tts_audio.get(request.get("input", ""))
+            if recorded is not None:
+                self._delay(recorded["elapsed"])
+                return self._send(recorded["audio"], content_type="audio/wav")
+        # Not part of a recorded turn (warm-up, filler bank, ...): plain mock answer
+        super().do_POST()
+
+
+def pcm_digest(pcm) -> str:
+    return hashlib.sha1(pcm).hexdigest()
+
+
+def pcm_digest_from_upload(body: bytes):
+    """Digest of the PCM frames in the WAV file of a multipart transcription upload."""
+    start = body.find(b"RIFF")
+    if start < 0:
+        return None
+    try:
+        with wave.open(BytesIO(body[start:]), "rb") as wav_file:
+            return pcm_digest(wav_file.readframes(wav_file.getnframes()))
+    except (wave.Error, EOFError):
+        return None
+
+
+def write_replay_config(path: str):
+    """Writes mock_config.json with result caching and speculative requests turned off."""
+    with open(MOCK_CONFIG) as f:
+        config = json.load(f)
+    config["shared_cache_enabled"] = False
+    config["llm_coalesce_enabled"] = False
+    # Partial transcriptions match no recorded recording and would only add plain mock requests
+    config["speculative_llm_enabled"] = False
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+
+
+def load_turns(paths: list[str], stack: ExitStack) -> list[list[dict]]:
+    """Reads every recording; returns one list of turns per recorded session."""
+    files = []
+    for path in paths:
+        files.extend(sorted(glob.glob(os.path.join(path, "*.turns"))) if os.path.isdir(path) else [path])
+    sessions = []
+    for path in files:
+        reader = stack.enter_context(TurnReader(path))
+        turns = list(reader.turns())
+        if turns:
+            sessions.append(turns)
+    return sessions
+
+
+def index_backends(sessions: list[list[dict]]):
+    """Fills the replay backend tables from the recorded events."""
+    for turns in sessions:
+        for turn in turns:
+            events = {name: (t, payload) for name, t, payload in turn["events"]}
+            timings = turn["timings"]
+            if "stt_text" in events and "mic_pcm" in events:
+                ReplayHandler.stt_answers[pcm_digest(events["mic_pcm"][1])] = events["stt_text"][1]
+            if "llm_response" in events:
+                user_text = (events.get("stt_text") or events.get("user_text"))[1]["text"]
+                ReplayHandler.llm_replies[user_text] = events["llm_response"][1]
+                if "tts_audio" in events:
+                    ReplayHandler.tts_audio[events["llm_response"][1]["content"]] = {
+                        "audio": bytes(events["tts_audio"][1]),
+                        "elapsed": timings.get("tts_s", 0.0),
+                    }
+
+
+async def replay_session(args, turns: list[dict], results: list[dict]):
+    client_args = argparse.Namespace(
+        url=args.url, ready_text=args.ready_text, reply_element=args.reply_element,
+        timeout=args.timeout, speedup=args.speed, mode="text", text="",
+    )
+    client = SimulatedClient(client_args, Stats(), [])
+    try:
+        await client.connect()
+        for turn in turns:
+            events = {name: payload for name, _, payload in turn["events"]}
+            if "mic_pcm" in events:
+                pcm = events["mic_pcm"]
+                chunk_bytes = int(SAMPLE_RATE * CHUNK_SECONDS) * 2
+                client.pcm_chunks = [bytes(pcm[i:i + chunk_bytes]) for i in range(0, len(pcm), chunk_bytes)]
+                client_args.mode = "audio"
+            elif "user_text" in events:
+                client_args.mode = "text"
+                client_args.text = events["user_text"]["text"]
+            else:
+                continue
+            await client.run_turn()
+            results.append({
+                "session": turn["meta"].get("session_id", "")[:8],
+                "mode": client_args.mode,
+                "recorded_s": turn["timings"].get("total_s"),
+                "replayed_s": client.stats.reply_audio[-1],
+            })
+    except Exception as e:
+        print(f"Replay of session {turns[0]['meta'].get('session_id', '')[:8]} failed: {type(e).__name__}: {e}")
+    finally:
+        await client.sio.disconnect()
+
+
+async def main_async(args, sessions):
+    results = []
+    await asyncio.gather(*(replay_session(args, turns, results) for turns in sessions))
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    print("\n--- Replay report ---")
+    for r in results:
+        recorded = r["recorded_s"] / args.speed if r["recorded_s"] is not None else None
+        delta = r["replayed_s"] - recorded if recorded is not None else None
+        print(f"{r['session']} {r['mode']:5} recorded {recorded or 0:.2f}s  replayed {r['replayed_s']:.2f}s  "
+              f"delta {'n/a' if delta is None else f'{delta:+.2f}s'}")
+    replayed = [r["replayed_s"] for r in results]
+    print(f"turns {len(results)}  replayed p50 {(percentile(replayed, 50) or 0):.2f}s  p90 {(percentile(replayed, 90) or 0):.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded turns through app.py")
+    parser.add_argument("paths", nargs="*", help=".turns files or directories containing them")
+    parser.add_argument("--write-config", metavar="PATH", help="Write the app.py config to replay against, then exit")
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Chainlit server URL")
+    parser.add_argument("--backend-host", default="127.0.0.1")
+    parser.add_argument("--backend-port", type=int, default=7999, help="Port app.py's config points its backends at")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace, 2 = twice as fast, ...")
+    parser.add_argument("--ready-text", default="Voice mode ready")
+    parser.add_argument("--reply-element", default="response_audio")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    if args.write_config:
+        write_replay_config(args.write_config)
+        print(f"Wrote {args.write_config}; start app.py with CHAINLOOT_CONFIG={args.write_config}")
+        return
+    if not args.paths:
+        parser.error("no .turns files or directories given")
+
+    with ExitStack() as stack:
+        sessions = load_turns(args.paths, stack)
+        if not sessions:
+            print("No recorded turns found.")
+            return
+        index_backends(sessions)
+        ReplayHandler.speed = args.speed
+        ReplayHandler.delays = {"llm": 0.0, "llm_token": 0.0, "tts": 0.0, "stt": 0.0}
+        server = ThreadingHTTPServer((args.backend_host, args.backend_port), ReplayHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Replay backend on http://{args.backend_host}:{args.backend_port}, "
+              f"{sum(len(t) for t in sessions)} turns from {len(sessions)} sessions")
+        try:
+            asyncio.run(main_async(args, sessions))
+        finally:
+            server.shutdown()
+            # Let the readers unmap right away instead of when the views are collected
+            sessions.clear()
+            ReplayHandler.stt_answers.clear()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Throughput vs. worker count for launcher.py.
+
+For each --workers value, starts the mock backends (once), launches
+launcher.py with that many workers against docs/testing/mock_config.json,
+runs load_test.py through the sticky proxy and collects its JSON report.
+Prints turns/sec and reply latency per worker count, and the speedup over the
+smallest worker count.
+
+Keep the mock delays low (the defaults here) so app.py's own Python work is
+the bottleneck rather than the simulated backends.
+
+Every session sends the same text and the mocks return fixed replies, so
+each run uses a copy of --config with LLM coalescing and the shared cache
+(TTS audio, sentiment results) turned off. Otherwise everything after the
+first turn would be a cache hit, and the benchmark would measure cache
+lookups rather than the work that has to scale with the worker count.
+
+Usage:
+    python docs/testing/scaling_benchmark.py --workers 1 2 4 --sessions 40 --mode audio --speedup 4
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.abspath(os.path.join(HERE, "..", ".."))
+
+
+def wait_for_port(host: str, port: int, timeout: float, process: subprocess.Popen = None):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"Process for port {port} exited with code {process.returncode}")
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.5)
+    raise TimeoutError(f"Nothing listening on {host}:{port} after {timeout:.0f}s")
+
+
+def stop(process: subprocess.Popen):
+    if process.poll() is None:
+        process.send_signal(signal.SIGINT)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def run_config(config_path: str, run_dir: str) -> str:
+    """Writes a copy of the config without result caching into `run_dir`; returns its path."""
+    with open(os.path.join(ROOT, config_path)) as f:
+        config = json.load(f)
+    config["llm_coalesce_enabled"] = False
+    config["shared_cache_enabled"] = False
+    path = os.path.join(run_dir, "config.json")
+    with open(path, "w") as f:
+        json.dump(config, f, indent=4)
+    return path
+
+
+def run_load_test(args, url: str) -> dict:
+    command = [
+        sys.executable, os.path.join(HERE, "load_test.py"), "--json", "--url", url,
+        "--sessions", str(args.sessions), "--turns", str(args.turns), "--ramp", str(args.ramp),
+        "--think-time", "0", "--mode", args.mode, "--speedup", str(args.speedup),
+    ]
+    result = subprocess.run(command, cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"load_test.py failed:\n{result.stderr}")
+    # Warnings may precede the report; it is the last JSON object printed
+    return json.loads(result.stdout[result.stdout.index("{"):])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure app.py throughput scaling with launcher.py worker count")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--port", type=int, default=8000, help="Proxy port")
+    parser.add_argument("--worker-port", type=int, default=8100)
+    parser.add_argument("--config", default=os.path.join("docs", "testing", "mock_config.json"))
+    parser.add_argument("--no-mock", action="store_true", help="Use already running backends from --config")
+    parser.add_argument("--llm-delay", type=float, default=0.05)
+    parser.add_argument("--tts-delay", type=float, default=0.05)
+    parser.add_argument("--stt-delay", type=float, default=0.05)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--ramp", type=float, default=20.0)
+    parser.add_argument("--mode", choices=["text", "audio"], default="text")
+    parser.add_argument("--speedup", type=float, default=4.0)
+    parser.add_argument("--start-timeout", type=float, default=180.0)
+    parser.add_argument("--json", action="store_true")
+    args = parser.parse_args()
+
+    mock = None
+    if not args.no_mock:
+        mock = subprocess.Popen([
+            sys.executable, os.path.join(HERE, "mock_backends.py"), "--port", "7999",
+            "--llm-delay", str(args.llm_delay), "--tts-delay", str(args.tts_delay), "--stt-delay", str(args.stt_delay),
+        ], cwd=ROOT)
+        wait_for_port("127.0.0.1", 7999, 10, mock)
+
+    results = []
+    try:
+        for count in args.workers:
+            with tempfile.TemporaryDirectory(prefix="chainloot-bench-") as run_dir:
+                launcher = subprocess.Popen([
+                    sys.executable, "launcher.py", "--workers", str(count), "--host", "127.0.0.1",
+                    "--port", str(args.port), "--worker-port", str(args.worker_port),
+                ], cwd=ROOT, env={**os.environ, "CHAINLOOT_CONFIG": run_config(args.config, run_dir)})
+                try:
+                    wait_for_port("127.0.0.1", args.port, args.start_timeout, launcher)
+                    print(f"Running load test against {count} worker(s)...")
+                    report = run_load_test(args, f"http://127.0.0.1:{args.port}")
+                finally:
+                    stop(launcher)
+            results.append({"workers": count, **report})
+    finally:
+        if mock is not None:
+            stop(mock)
+
+    if args.json:
+        print(json.dumps(results, indent=4))
+        return
+    baseline = results[0]["turns_per_s"] if results and results[0]["turns_per_s"] else None
+    print("\n--- Scaling report ---")
+    print(f"{'workers':>7} {'turns/s':>8} {'speedup':>8} {'audio p50':>10} {'audio p90':>10} {'errors':>6}")
+    for r in results:
+        speedup = r["turns_per_s"] / baseline if baseline and r["turns_per_s"] else None
+        p50 = r.get("reply_audio_p50_ms")
+        p90 = r.get("reply_audio_p90_ms")
+        print(f"{r['workers']:>7} {r['turns_per_s'] or 0:>8.2f} {'n/a' if speedup is None else f'{speedup:.2f}x':>8} "
+              f"{'n/a' if p50 is None else f'{p50:.0f}ms':>10} {'n/a' if p90 is None else f'{p90:.0f}ms':>10} {r['errors']:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Multi-worker launcher for app.py.
+
+One `chainlit run app.py` process runs all Python work (classifier, WAV
+building, config I/O) on a single core. The launcher starts --workers copies
+on consecutive ports after --worker-port, and serves them behind a sticky
+front proxy (lib/sticky_proxy.py) on --port, so a browser session always
+reaches the worker that holds its Chainlit session.
+
+Workers share discovery results, TTS audio and classifier results through
+the SQLite store in lib/shared_cache.py (`shared_cache_path` in config.json).
+Each worker gets CHAINLOOT_WORKER=<index> in its environment.
+
+Memory grows linearly with --workers: every worker is a full app.py process
+that loads its own copy of the DistilBERT emotion classifier (on the GPU when
+CUDA is available) plus Chainlit and its per-session state. Measure one
+worker's RSS / VRAM before raising the count; on a 12 GB card that also
+hosts the LLM and Chatterbox, stay at the default of 2.
+
+Usage:
+    python launcher.py --workers 4 --port 8000
+    CHAINLOOT_CONFIG=docs/testing/mock_config.json python launcher.py --workers 2
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+from lib.sticky_proxy import StickyProxy
+
+
+def worker_command(host: str, port: int) -> list[str]:
+    chainlit = shutil.which("chainlit")
+    base = [chainlit] if chainlit else [sys.executable, "-m", "chainlit"]
+    return base + ["run", "app.py", "--headless", "--host", host, "--port", str(port)]
+
+
+def start_worker(index: int, host: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "CHAINLOOT_WORKER": str(index)}
+    print(f"Starting worker {index} on http://{host}:{port}")
+    return subprocess.Popen(worker_command(host, port), env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+
+
+async def wait_for_port(host: str, port: int, process: subprocess.Popen, timeout: float):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Worker on port {port} exited with code {process.returncode}")
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.5)
+    raise TimeoutError(f"Worker on port {port} did not start within {timeout:.0f}s")
+
+
+async def supervise(workers: list, host: str, ports: list[int], proxy: StickyProxy):
+    """Restarts workers that exit; their sessions are lost, but new ones keep being routed there."""
+    while True:
+        await asyncio.sleep(2)
+        for i, process in enumerate(workers):
+            if process.poll() is not None:
+                print(f"Worker {i} exited with code {process.returncode}, restarting "
+                      f"({proxy.connections[i]} open connections dropped)")
+                workers[i] = start_worker(i, host, ports[i])
+
+
+async def main_async(args, workers: list):
+    ports = [args.worker_port + i for i in range(args.workers)]
+    for i, port in enumerate(ports):
+        workers.append(start_worker(i, args.worker_host, port))
+    await asyncio.gather(*(wait_for_port(args.worker_host, port, workers[i], args.start_timeout) for i, port in enumerate(ports)))
+
+    proxy = StickyProxy([(args.worker_host, port) for port in ports])
+    print(f"{args.workers} workers ready, serving on http://{args.host}:{args.port}")
+    await asyncio.gather(proxy.serve(args.host, args.port), supervise(workers, args.worker_host, ports, proxy))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run several app.py workers behind a sticky proxy")
+    parser.add_argument("--workers", type=int, default=2, help="Number of app.py processes; each loads its own classifier")
+    parser.add_argument("--host", default="0.0.0.0", help="Address the proxy listens on")
+    parser.add_argument("--port", type=int, default=8000, help="Port the proxy listens on")
+    parser.add_argument("--worker-host", default="127.0.0.1")
+    parser.add_argument("--worker-port", type=int, default=8100, help="Port of worker 0; worker i uses this + i")
+    parser.add_argument("--start-timeout", type=float, default=120.0, help="Seconds to wait for each worker to listen")
+    args = parser.parse_args()
+
+    workers = []
+    try:
+        asyncio.run(main_async(args, workers))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in workers:
+            process.terminate()
+        for process in workers:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+if __name__ == "__main__":
+    main()
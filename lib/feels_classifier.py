@@ -1,3 +1,4 @@
+import re
 import torch
 import warnings
 from transformers import pipeline, AutoTokenizer, logging
@@ -35,6 +36,63 @@ except Exception as e:
     print(f"Error initializing classifier: {e}")
     classifier = None
 
+# Cheap lexicon pre-classifier. It only ever answers "neutral": text with no
+# emotional cue words and no !/? is treated as neutral without running the
+# model. Any cue means the lexicon is unsure and the caller falls back to
+# DistilBERT.
+EMOTION_CUES = {
+    "admiration": ["amazing", "awesome", "impressive", "brilliant", "wonderful", "beautiful"],
+    "amusement": ["haha", "lol", "funny", "hilarious"],
+    "anger": ["angry", "furious", "hate", "rage", "mad"],
+    "annoyance": ["annoying", "annoyed", "ugh", "irritating"],
+    "approval": ["agree", "approve", "exactly", "correct"],
+    "caring": ["care", "careful", "safe", "help"],
+    "confusion": ["confused", "confusing", "unsure", "puzzled"],
+    "curiosity": ["curious", "wonder", "interesting"],
+    "desire": ["want", "wish", "crave", "desire"],
+    "disappointment": ["disappointed", "disappointing", "unfortunately"],
+    "disapproval": ["disagree", "wrong", "bad", "shouldn't"],
+    "disgust": ["disgusting", "gross", "yuck"],
+    "embarrassment": ["embarrassed", "embarrassing", "awkward"],
+    "excitement": ["excited", "exciting", "thrilled", "wow"],
+    "fear": ["afraid", "scared", "fear", "terrified", "danger"],
+    "gratitude": ["thanks", "thank", "grateful", "appreciate"],
+    "grief": ["grief", "mourn", "died", "loss"],
+    "joy": ["happy", "glad", "joy", "great", "delighted", "love"],
+    "love": ["love", "adore", "dear"],
+    "nervousness": ["nervous", "anxious", "worried", "worry"],
+    "optimism": ["hope", "hopefully", "optimistic"],
+    "pride": ["proud", "pride"],
+    "realization": ["realize", "realized", "oh"],
+    "relief": ["relief", "relieved", "phew", "finally"],
+    "remorse": ["sorry", "apologize", "regret"],
+    "sadness": ["sad", "unhappy", "cry", "miss", "lonely"],
+    "surprise": ["surprised", "surprise", "unexpected", "whoa"],
+}
+CUE_WORDS = {word for words in EMOTION_CUES.values() for word in words}
+LEXICON_NEUTRAL_SCORE = 0.75
+# Emoji and pictographs almost always carry emotion
+EMOJI_RE = re.compile("[\u2600-\u27bf\U0001f300-\U0001faff]")
+
+def lexicon_classify(text_content: str):
+    """
+    Resolves obviously neutral text without the transformer.
+
+    Args:
+        text_content: The unscrubbed text; apostrophes and emoji are cues too.
+
+    Returns:
+        {"emotion": "neutral", "score": LEXICON_NEUTRAL_SCORE, "source": "lexicon"} when the text has
+        no emotional cues, or None when the lexicon is unsure and the model should decide.
+    """
+    if "!" in text_content or "?" in text_content or EMOJI_RE.search(text_content):
+        return None
+    # LLMs often write typographic apostrophes ("shouldn’t")
+    words = re.findall(r"[a-z']+", text_content.lower().replace("\u2019", "'"))
+    if not words or any(word in CUE_WORDS for word in words):
+        return None
+    return {"emotion": "neutral", "score": LEXICON_NEUTRAL_SCORE, "source": "lexicon"}
+
 def classify_sentiment(text_content: str) -> dict:
     """
     Classifies the sentiment of the given text content.
@@ -61,7 +119,8 @@ def classify_sentiment(text_content: str) -> dict:
         if predictions and predictions[0]:
             result = {
                 "emotion": predictions[0][0]['label'],
-                "score": predictions[0][0]['score']
+                "score": predictions[0][0]['score'],
+                "source": "model"
             }
             return result
         else:
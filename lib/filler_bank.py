@@ -0,0 +1,171 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import shutil
+import time
+
+# Short clips played while the real reply is still being generated.
+#
+# | kind     | when                                   |
+# |----------|----------------------------------------|
+# | greeting | right after on_chat_start              |
+# | filler   | at the start of each turn ("hmm", ...) |
+#
+# Clips are synthesized once per (voice, character, TTS params) fingerprint and
+# stored on disk under <root_dir>/<fingerprint>/, alongside a manifest.json.
+# Changing the voice or any TTS param changes the fingerprint, so stale clips
+# are never played and get pruned once the bank count exceeds max_banks.
+
+MANIFEST_NAME = "manifest.json"
+
+
+def bank_fingerprint(voice: str, character: str, speed: float, params: dict) -> str:
+    """
+    Computes the bank key for a voice/character/TTS-params combination.
+
+    Args:
+        voice: The TTS voice the clips are spoken in.
+        character: The character profile the phrases belong to.
+        speed: The TTS speed.
+        params: The Chatterbox `params` payload used for synthesis.
+
+    Returns:
+        A short hex digest identifying the bank.
+    """
+    payload = json.dumps(
+        {"voice": voice, "character": character, "speed": speed, "params": params},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class FillerBank:
+    """
+    Per-voice, per-character bank of precomputed greeting and filler clips.
+
+    Args:
+        root_dir: Directory the banks are stored in.
+        synthesize: Coroutine `(text, voice, speed, params, tune=...) -> bytes` used to render clips;
+            called with `tune=False`, since clips are rendered in the background.
+        file_ext: Extension of the audio files returned by `synthesize`.
+        max_banks: Number of banks kept on disk before the oldest are pruned.
+    """
+
+    def __init__(self, root_dir: str, synthesize, file_ext: str = "wav", max_banks: int = 8):
+        self.root_dir = root_dir
+        self.synthesize = synthesize
+        self.file_ext = file_ext
+        self.max_banks = max_banks
+        # key -> {"greeting": [paths], "filler": [paths]}; kept in memory so
+        # picking a clip never touches the disk from the event loop.
+        self._index = {}
+        self._locks = {}
+        self._load_existing()
+
+    def _bank_dir(self, key: str) -> str:
+        return os.path.join(self.root_dir, key)
+
+    def _load_existing(self):
+        """Indexes banks already on disk from a previous run."""
+        if not os.path.isdir(self.root_dir):
+            return
+        for key in os.listdir(self.root_dir):
+            manifest_path = os.path.join(self._bank_dir(key), MANIFEST_NAME)
+            try:
+                with open(manifest_path, "r") as f:
+                    manifest = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+            clips = {
+                kind: [os.path.join(self._bank_dir(key), name) for name in names]
+                for kind, names in manifest.get("clips", {}).items()
+            }
+            if all(os.path.exists(p) for paths in clips.values() for p in paths):
+                self._index[key] = clips
+
+    def is_ready(self, key: str) -> bool:
+        return key in self._index
+
+    def pick(self, key: str, kind: str):
+        """
+        Picks a random clip of the given kind from a ready bank.
+
+        Args:
+            key: The bank fingerprint.
+            kind: "greeting" or "filler".
+
+        Returns:
+            The clip path, or None if the bank is not synthesized yet.
+        """
+        clips = self._index.get(key, {}).get(kind)
+        if not clips:
+            return None
+        return random.choice(clips)
+
+    async def ensure(self, voice: str, character: str, speed: float, params: dict, phrases: dict) -> str:
+        """
+        Synthesizes the bank for the given settings unless it already exists.
+
+        Concurrent calls for the same fingerprint share a single synthesis run.
+
+        Args:
+            voice: The TTS voice.
+            character: The character profile.
+            speed: The TTS speed.
+            params: The Chatterbox `params` payload.
+            phrases: Mapping of kind -> list of phrases, e.g. {"greeting": [...], "filler": [...]}.
+
+        Returns:
+            The bank fingerprint.
+        """
+        key = bank_fingerprint(voice, character, speed, params)
+        if key in self._index:
+            return key
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if key in self._index:
+                return key
+            bank_dir = self._bank_dir(key)
+            await asyncio.to_thread(os.makedirs, bank_dir, exist_ok=True)
+            clips = {}
+            manifest = {"voice": voice, "character": character, "created": time.time(), "clips": {}}
+            for kind, texts in phrases.items():
+                clips[kind] = []
+                manifest["clips"][kind] = []
+                for i, text in enumerate(texts):
+                    audio = await self.synthesize(text, voice, speed, params, tune=False)
+                    name = f"{kind}_{i}.{self.file_ext}"
+                    path = os.path.join(bank_dir, name)
+                    await asyncio.to_thread(_write_bytes, path, audio)
+                    clips[kind].append(path)
+                    manifest["clips"][kind].append(name)
+            await asyncio.to_thread(_write_bytes, os.path.join(bank_dir, MANIFEST_NAME), json.dumps(manifest, indent=4).encode("utf-8"))
+            self._index[key] = clips
+        self._locks.pop(key, None)
+        await asyncio.to_thread(self.prune, key)
+        return key
+
+    def prune(self, keep_key: str = None):
+        """Removes the oldest banks once more than `max_banks` are on disk."""
+        if not os.path.isdir(self.root_dir):
+            return
+        bank_dirs = [
+            os.path.join(self.root_dir, key)
+            for key in os.listdir(self.root_dir)
+            if os.path.isdir(os.path.join(self.root_dir, key))
+        ]
+        bank_dirs.sort(key=os.path.getmtime, reverse=True)
+        for bank_dir in bank_dirs[self.max_banks:]:
+            key = os.path.basename(bank_dir)
+            if key == keep_key:
+                continue
+            self._index.pop(key, None)
+            shutil.rmtree(bank_dir, ignore_errors=True)
+
+
+def _write_bytes(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
@@ -0,0 +1,104 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+# Single-flight deduplication for deterministic chat completions.
+#
+# Kiosk sessions often share a character, the default llm_temp of 0.0 and the
+# same opening question. With temperature 0 the backend returns the same reply
+# for the same (model, system prompt, messages), so concurrent identical calls
+# can share one in-flight request and repeats shortly after can be served from
+# a short-TTL cache. Anything non-deterministic bypasses both.
+
+
+def request_key(kwargs: dict) -> str:
+    """Hashes every argument that can change the completion."""
+    payload = json.dumps(kwargs, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def is_deterministic(kwargs: dict) -> bool:
+    """
+    Decides whether a chat completion request may be shared.
+
+    Args:
+        kwargs: The keyword arguments for `chat.completions.create`.
+
+    Returns:
+        True for temperature 0 non-streaming requests returning a single choice.
+    """
+    temperature = kwargs.get("temperature")
+    if temperature is None or float(temperature) != 0.0:
+        return False
+    if kwargs.get("stream") or kwargs.get("n", 1) != 1:
+        return False
+    return True
+
+
+class LLMCoalescer:
+    """
+    Coalesces identical concurrent deterministic LLM requests and caches their results briefly.
+
+    Args:
+        ttl_s: How long a finished result is reused; 0 disables the cache but keeps single-flight.
+        max_entries: Maximum number of cached results.
+        enabled: When False every request is passed straight through.
+    """
+
+    def __init__(self, ttl_s: float = 30, max_entries: int = 256, enabled: bool = True):
+        self.enabled = enabled
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self._inflight = {}
+        # key -> (expires_at, response), oldest first
+        self._cache = OrderedDict()
+        self.stats = {"hits": 0, "coalesced": 0, "misses": 0, "bypassed": 0}
+
+    async def create(self, create_fn, **kwargs):
+        """
+        Calls `create_fn(**kwargs)`, sharing the result with identical deterministic calls.
+
+        Args:
+            create_fn: The coroutine function to call, e.g. `client.chat.completions.create`.
+            **kwargs: The request arguments.
+
+        Returns:
+            The (possibly shared) response object. Callers must treat it as read-only.
+        """
+        if not self.enabled or not is_deterministic(kwargs):
+            self.stats["bypassed"] += 1
+            return await create_fn(**kwargs)
+
+        key = request_key(kwargs)
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, response = cached
+            if time.monotonic() < expires_at:
+                self.stats["hits"] += 1
+                return response
+            del self._cache[key]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+        else:
+            self.stats["misses"] += 1
+            task = asyncio.ensure_future(create_fn(**kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._finish(key, t))
+        # Shield so one caller giving up does not cancel the request for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Future):
+        self._inflight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or self.ttl_s <= 0:
+            return
+        self._cache[key] = (time.monotonic() + self.ttl_s, task.result())
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,141 @@
+import asyncio
+import time
+
+# Helpers for rendering a streamed chat completion.
+#
+# TokenBatcher coalesces deltas so a fast model does not cost one socket.io
+# emit per token: a batch is flushed once it holds max_chars characters, or
+# interval_s after the previous flush, whichever comes first.
+#
+# ThinkSplitter separates reasoning from the answer when the model wraps it in
+# <think>...</think> (the convention of most local reasoning models), keeping
+# a partial tag at the end of a delta until the next delta completes it.
+
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+
+class TokenBatcher:
+    """
+    Buffers streamed text and hands it to `flush` in batches.
+
+    Args:
+        flush: Coroutine `(text) -> None`, e.g. `cl.Message.stream_token`.
+        interval_s: Longest time a delta waits in the buffer.
+        max_chars: Buffered size that triggers an immediate flush.
+    """
+
+    def __init__(self, flush, interval_s: float = 0.05, max_chars: int = 64):
+        self._flush = flush
+        self.interval_s = interval_s
+        self.max_chars = max_chars
+        self._buffer = []
+        self._size = 0
+        self._last_flush = time.perf_counter()
+        self._timer = None
+        self._woken_timer = None
+        # Serializes flushes so batches reach the socket in order
+        self._lock = asyncio.Lock()
+        self.deltas = 0
+        self.flushes = 0
+
+    async def add(self, text: str):
+        if not text:
+            return
+        self.deltas += 1
+        self._buffer.append(text)
+        self._size += len(text)
+        if self._size >= self.max_chars or time.perf_counter() - self._last_flush >= self.interval_s:
+            await self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(max(0.0, self.interval_s - (time.perf_counter() - self._last_flush)))
+        self._timer = None
+        self._woken_timer = asyncio.current_task()
+        try:
+            await self.flush()
+        finally:
+            self._woken_timer = None
+
+    async def flush(self):
+        """Sends whatever is buffered."""
+        if self._timer is not None and self._timer is not asyncio.current_task():
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        text = "".join(self._buffer)
+        self._buffer.clear()
+        self._size = 0
+        self._last_flush = time.perf_counter()
+        self.flushes += 1
+        async with self._lock:
+            await self._flush(text)
+
+    async def close(self):
+        """Flushes the remainder and waits until every batch is sent; call once the stream has ended."""
+        # A timer that already woke up has taken its batch out of the buffer but may still be sending it
+        woken = self._woken_timer
+        await self.flush()
+        if woken is not None:
+            await woken
+        async with self._lock:
+            pass
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    """Length of the longest suffix of `text` that is a prefix of `tag`."""
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ThinkSplitter:
+    """Splits streamed content into (reasoning, answer) text across delta boundaries."""
+
+    def __init__(self):
+        self._in_think = False
+        self._pending = ""
+        self._answer_started = False
+
+    def feed(self, text: str) -> tuple[str, str]:
+        """
+        Consumes one content delta.
+
+        Returns:
+            (reasoning, answer) text that is complete so far; either may be empty.
+        """
+        data = self._pending + text
+        self._pending = ""
+        reasoning, answer = [], []
+        while data:
+            tag = THINK_CLOSE if self._in_think else THINK_OPEN
+            target = reasoning if self._in_think else answer
+            index = data.find(tag)
+            if index >= 0:
+                target.append(data[:index])
+                data = data[index + len(tag):]
+                self._in_think = not self._in_think
+                continue
+            keep = _partial_tag_length(data, tag)
+            target.append(data[:len(data) - keep])
+            self._pending = data[len(data) - keep:]
+            break
+        return "".join(reasoning), self._trim_answer("".join(answer))
+
+    def close(self) -> tuple[str, str]:
+        """Returns any text held back as a possible partial tag."""
+        pending, self._pending = self._pending, ""
+        if self._in_think:
+            return pending, ""
+        return "", self._trim_answer(pending)
+
+    def _trim_answer(self, answer: str) -> str:
+        # Drop the whitespace models put between </think> and the answer
+        if not self._answer_started:
+            answer = answer.lstrip()
+            self._answer_started = bool(answer)
+        return answer
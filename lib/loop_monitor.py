@@ -0,0 +1,181 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+# Diagnostic mode for finding blocking calls inside async handlers (sync STT,
+# config.json I/O, process_message_for_tts, ...).
+#
+# Two parts:
+# - a sampler task on the event loop that sleeps for `interval_ms` and records
+#   how late it wakes up into a lag histogram;
+# - a watchdog thread that notices when the sampler's heartbeat goes stale for
+#   longer than `threshold_ms` and grabs the loop thread's stack while the
+#   blocking callback is still running, naming the first project frame under
+#   the asyncio dispatch (usually the Chainlit handler, e.g. on_audio_end).
+
+BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LoopMonitor:
+    """
+    Samples event-loop lag and reports callbacks that hold the loop too long.
+
+    Args:
+        threshold_ms: Stall length that counts as a blocking call.
+        interval_ms: Sampling interval of the lag probe.
+        export_path: Optional JSON file the histogram is written to.
+        export_every_s: How often the histogram is exported.
+        project_root: Frames under this directory are treated as project code.
+        max_events: Number of blocking events kept for export.
+    """
+
+    def __init__(self, threshold_ms: float = 100, interval_ms: float = 50, export_path: str = None,
+                 export_every_s: float = 10, project_root: str = None, max_events: int = 50):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.export_path = export_path
+        self.export_every_s = export_every_s
+        self.project_root = os.path.abspath(project_root or os.getcwd())
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.samples = 0
+        self.max_lag = 0.0
+        self.blocking_events = deque(maxlen=max_events)
+        self._task = None
+        self._loop_thread_id = None
+        self._heartbeat = time.monotonic()
+        self._open_event = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Starts sampling on the running event loop; calling it again is a no-op."""
+        if self._task is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = loop.create_task(self._sample())
+        threading.Thread(target=self._watchdog, name="loop-monitor", daemon=True).start()
+        print(f"Debug: Loop monitor started (threshold {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _sample(self):
+        last_export = time.monotonic()
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            self._record(now - start - self.interval)
+            if self.export_path and now - last_export >= self.export_every_s:
+                last_export = now
+                await asyncio.to_thread(self.export_to_file)
+
+    def _record(self, lag: float):
+        lag = max(lag, 0.0)
+        lag_ms = lag * 1000
+        for i, bound in enumerate(BUCKETS_MS):
+            if lag_ms <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        # The watchdog opened an event while the loop was stuck; now we know how long it lasted
+        if self._open_event is not None:
+            self._open_event["stalled_ms"] = round(lag_ms, 1)
+            self._open_event = None
+
+    def _watchdog(self):
+        reported_heartbeat = None
+        while not self._stopped.wait(self.threshold / 2):
+            heartbeat = self._heartbeat
+            stalled = time.monotonic() - heartbeat - self.interval
+            if stalled < self.threshold or heartbeat == reported_heartbeat:
+                continue
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.format_stack(frame)
+            event = {
+                "time": time.time(),
+                "handler": self._find_handler(frame),
+                "stalled_ms": round(stalled * 1000, 1),
+                "stack": stack,
+            }
+            self.blocking_events.append(event)
+            self._open_event = event
+            print(f"Warning: Event loop blocked for >{stalled * 1000:.0f} ms in {event['handler']}\n{''.join(stack)}")
+
+    def _find_handler(self, frame) -> str:
+        """Names the first project frame below the asyncio dispatch, i.e. the handler that entered the blocking call."""
+        frames = []
+        while frame is not None:
+            frames.append(frame)
+            frame = frame.f_back
+        frames.reverse()
+        asyncio_dir = os.path.dirname(os.path.abspath(asyncio.__file__))
+        start = 0
+        for i, f in enumerate(frames):
+            if os.path.abspath(f.f_code.co_filename).startswith(asyncio_dir):
+                start = i + 1
+        for f in frames[start:]:
+            filename = os.path.abspath(f.f_code.co_filename)
+            if filename.startswith(self.project_root) and "site-packages" not in filename:
+                return f"{f.f_code.co_name} ({os.path.relpath(filename, self.project_root)}:{f.f_lineno})"
+        return "<unknown>"
+
+    def percentile(self, pct: float):
+        """Approximates a lag percentile in ms from the histogram (upper bucket bound)."""
+        if not self.samples:
+            return None
+        target = self.samples * pct / 100
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKETS_MS[i] if i < len(BUCKETS_MS) else self.max_lag * 1000
+        return self.max_lag * 1000
+
+    def export(self) -> dict:
+        """
+        Summarizes the lag histogram and recent blocking events.
+
+        Returns:
+            A JSON-serializable dictionary.
+            Example: {"samples": 1200, "max_ms": 412.0, "p99_ms": 250, "histogram": {"<=1ms": 1100, ...}, "blocking_events": [...]}
+        """
+        histogram = {f"<={bound}ms": self.counts[i] for i, bound in enumerate(BUCKETS_MS)}
+        histogram[f">{BUCKETS_MS[-1]}ms"] = self.counts[-1]
+        return {
+            "threshold_ms": self.threshold * 1000,
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "max_ms": round(self.max_lag * 1000, 1),
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "histogram": histogram,
+            "blocking_events": list(self.blocking_events),
+        }
+
+    def export_to_file(self, path: str = None):
+        path = path or self.export_path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.export(), f, indent=4)
+        os.replace(tmp_path, path)
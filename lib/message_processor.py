@@ -1,12 +1,92 @@
+import random
 from .text_utils import scrub_unsafe_characters, chunk_text
-from .feels_classifier import classify_sentiment
+from .feels_classifier import classify_sentiment, lexicon_classify
+from .shared_cache import cache_key
 
-def process_message_for_tts(message: str) -> list[dict]:
+# Fast path for short replies: a reply of at most fast_path_max_words words is
+# well under chunk_text's 200-token limit, so it is used as a single chunk
+# without running the tokenizer, and the lexicon pre-classifier gets a chance
+# to resolve it as neutral before DistilBERT runs. A sample (audit_rate) of the
+# lexicon's answers is also run through the model to measure how often the two
+# agree.
+fast_path_stats = {
+    "calls": 0,
+    "short": 0,
+    "lexicon": 0,
+    "audited": 0,
+    "agreed": 0,
+}
+
+def fast_path_report() -> dict:
+    """
+    Summarizes how much work the fast path saves and how trustworthy it is.
+
+    Returns:
+        The raw counters plus "lexicon_share" (share of all classified chunks, short and long replies,
+        resolved without the model)
+        and "agreement_rate" (share of audited lexicon answers the model agreed with).
+    """
+    report = dict(fast_path_stats)
+    report["lexicon_share"] = fast_path_stats["lexicon"] / fast_path_stats["calls"] if fast_path_stats["calls"] else None
+    report["agreement_rate"] = fast_path_stats["agreed"] / fast_path_stats["audited"] if fast_path_stats["audited"] else None
+    return report
+
+def classify_with_cache(text_content: str, cache=None) -> dict:
+    """
+    Runs the model, reusing results already computed for the same text by any worker.
+
+    Args:
+        text_content: The scrubbed chunk.
+        cache: Optional lib.shared_cache.SharedCache.
+    """
+    if cache is None:
+        return classify_sentiment(text_content)
+    key = cache_key(text_content)
+    sentiment = cache.get_json("sentiment", key)
+    if sentiment is None:
+        sentiment = classify_sentiment(text_content)
+        if "error" not in sentiment:
+            cache.set_json("sentiment", key, sentiment)
+    return sentiment
+
+def classify_chunk(text_content: str, raw_chunk: str = None, audit_rate: float = 0.1, cache=None) -> dict:
+    """
+    Classifies a chunk with the lexicon, falling back to the model when the lexicon is unsure.
+
+    Args:
+        text_content: The scrubbed chunk, as the model sees it.
+        raw_chunk: The chunk before scrubbing, for the lexicon: scrubbing drops apostrophes and
+            emoji the lexicon relies on. Defaults to `text_content`.
+        audit_rate: Share of lexicon answers that are also checked against the model.
+        cache: Optional lib.shared_cache.SharedCache for model results.
+
+    Returns:
+        The sentiment dict, with "source" set to "lexicon" or "model".
+    """
+    sentiment = lexicon_classify(raw_chunk if raw_chunk is not None else text_content)
+    if sentiment is None:
+        return classify_with_cache(text_content, cache)
+    fast_path_stats["lexicon"] += 1
+    if random.random() < audit_rate:
+        checked = classify_with_cache(text_content, cache)
+        if "error" not in checked:
+            fast_path_stats["audited"] += 1
+            fast_path_stats["agreed"] += checked["emotion"] == sentiment["emotion"]
+            if checked["emotion"] != sentiment["emotion"]:
+                print(f"Debug: Lexicon said {sentiment['emotion']}, model said {checked['emotion']} "
+                      f"({checked['score']:.2f}) for: {text_content[:60]!r}")
+    return sentiment
+
+def process_message_for_tts(message: str, fast_path_max_words: int = 30, audit_rate: float = 0.1, cache=None) -> list[dict]:
     """
     Processes a message by chunking, scrubbing, and classifying sentiment for each chunk.
 
     Args:
         message: The input message string from the LLM.
+        fast_path_max_words: Replies up to this many words skip chunking and may skip the model.
+            0 disables the fast path.
+        audit_rate: Share of lexicon answers that are also run through the model.
+        cache: Optional lib.shared_cache.SharedCache shared by all workers for model results.
 
     Returns:
         A list of dictionaries, where each dictionary contains the processed chunk,
@@ -14,9 +94,15 @@ def process_message_for_tts(message: str) -> list[dict]:
         Example: [{"original_chunk": "...", "processed_chunk": "...", "sentiment": {"emotion": "joy", "score": 0.99}}]
     """
     
-    # Chunk the message if it's too long
-    # The chunk_text function handles the tokenization and splitting
-    chunks = chunk_text(message)
+    short = 0 < len(message.split()) <= fast_path_max_words
+    if short:
+        # Far below the chunk limit, no need to tokenize
+        fast_path_stats["short"] += 1
+        chunks = [message]
+    else:
+        # Chunk the message if it's too long
+        # The chunk_text function handles the tokenization and splitting
+        chunks = chunk_text(message)
     
     processed_results = []
 
@@ -25,11 +111,17 @@ def process_message_for_tts(message: str) -> list[dict]:
         scrubbed_chunk = scrub_unsafe_characters(chunk)
         
         # Classify the sentiment of the scrubbed chunk
-        sentiment = classify_sentiment(scrubbed_chunk)
+        # Every chunk counts, so lexicon_share is relative to all classification work
+        fast_path_stats["calls"] += 1
+        if short:
+            sentiment = classify_chunk(scrubbed_chunk, chunk, audit_rate, cache)
+        else:
+            sentiment = classify_with_cache(scrubbed_chunk, cache)
         
         # Print debug statement
         if "error" not in sentiment:
-            print(f"Debug: Sentiment for chunk - Emotion: {sentiment['emotion']}, Score: {sentiment['score']:.2f}")
+            print(f"Debug: Sentiment for chunk - Emotion: {sentiment['emotion']}, Score: {sentiment['score']:.2f}, "
+                  f"Source: {sentiment.get('source', 'model')}")
         else:
             print(f"Debug: Sentiment classification failed for chunk: {sentiment['error']}")
             
@@ -61,4 +153,10 @@ if __name__ == "__main__":
         print(f"\n--- Chunk {i+1} ---")
         print(f"Original Chunk: {result['original_chunk']}")
         print(f"Scrubbed Chunk: {result['processed_chunk']}")
-        print(f"Sentiment: {result['sentiment']}")
\ No newline at end of file
+        print(f"Sentiment: {result['sentiment']}")
+
+    neutral_message = "The old road runs north past the mill and ends at the river crossing."
+    print("\n--- Processing neutral message ---")
+    results_neutral = process_message_for_tts(neutral_message, audit_rate=1.0)
+    print(f"Sentiment: {results_neutral[0]['sentiment']}")
+    print(f"Fast path: {fast_path_report()}")
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import time
+
+# Per-session memory accounting for the heavy state app.py keeps around:
+#
+# | key          | what                                             |
+# |--------------|--------------------------------------------------|
+# | audio_buffer | mic PCM chunks collected between audio start/end |
+#
+# Reply audio is not tracked: cl.Audio writes its content into Chainlit's own
+# per-session files directory on send and only keeps the path, so the bytes
+# are released once the reply is sent. Sessions idle for longer than `idle_s`
+# get their heavy state evicted.
+
+
+def read_rss_bytes(pid: int = None):
+    """Reads the resident set size of `pid` (default: this process) from /proc (Linux only)."""
+    try:
+        with open(f"/proc/{pid or os.getpid()}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+class SessionMemory:
+    """
+    Tracks heavy per-session state and evicts idle sessions.
+
+    Args:
+        max_recording_bytes: Cap on mic audio buffered for a single recording.
+        idle_s: Seconds without activity before a session's heavy state is evicted.
+    """
+
+    def __init__(self, max_recording_bytes: int = 60 * 24000 * 2, idle_s: float = 600):
+        self.max_recording_bytes = max_recording_bytes
+        self.idle_s = idle_s
+        # session_id -> {"last_active": float, "bytes": {key: int}}
+        self._sessions = {}
+        self._evictor = None
+        # Process memory before any session exists (models, clients, caches)
+        self._baseline_rss = read_rss_bytes()
+
+    def _state(self, session_id: str) -> dict:
+        return self._sessions.setdefault(session_id, {"last_active": time.monotonic(), "bytes": {}})
+
+    def touch(self, session_id: str):
+        self._state(session_id)["last_active"] = time.monotonic()
+
+    def account(self, session_id: str, key: str, nbytes: int):
+        """Records that `session_id` currently holds `nbytes` of state under `key`."""
+        state = self._state(session_id)
+        state["last_active"] = time.monotonic()
+        if nbytes:
+            state["bytes"][key] = nbytes
+        else:
+            state["bytes"].pop(key, None)
+
+    def release(self, session_id: str):
+        """Forgets a session."""
+        self._sessions.pop(session_id, None)
+
+    def idle_sessions(self) -> list[str]:
+        now = time.monotonic()
+        return [sid for sid, state in self._sessions.items() if now - state["last_active"] > self.idle_s]
+
+    def report(self) -> dict:
+        """
+        Summarizes tracked memory per session and the process resident memory.
+
+        Returns:
+            Example: {"sessions": 3, "rss_bytes": 812000000, "rss_per_session_bytes": 1200000,
+                      "tracked_bytes": {"<session id>": {"audio_buffer": 96000}}}
+        """
+        rss = read_rss_bytes()
+        sessions = len(self._sessions)
+        per_session = None
+        if rss and self._baseline_rss and sessions:
+            per_session = max(rss - self._baseline_rss, 0) // sessions
+        return {
+            "sessions": sessions,
+            "rss_bytes": rss,
+            "rss_per_session_bytes": per_session,
+            "tracked_bytes": {sid: dict(state["bytes"]) for sid, state in self._sessions.items()},
+        }
+
+    def start_evictor(self, evict_fn, interval_s: float = 60):
+        """
+        Starts the background idle-session evictor; calling it again is a no-op.
+
+        Args:
+            evict_fn: Callable `(session_id)` that drops the session's heavy state.
+            interval_s: Seconds between eviction sweeps.
+        """
+        if self._evictor is None:
+            self._evictor = asyncio.get_running_loop().create_task(self._evict_loop(evict_fn, interval_s))
+
+    async def _evict_loop(self, evict_fn, interval_s: float):
+        while True:
+            await asyncio.sleep(interval_s)
+            for session_id in self.idle_sessions():
+                try:
+                    evict_fn(session_id)
+                except Exception as e:
+                    print(f"Warning: Failed to evict session {session_id}: {e}")
+                self.release(session_id)
+                print(f"Debug: Evicted heavy state of idle session {session_id}")
+            report = self.report()
+            if report["sessions"]:
+                rss_mb = (report["rss_bytes"] or 0) / 2**20
+                per_session_kb = (report["rss_per_session_bytes"] or 0) / 1024
+                tracked_kb = sum(sum(b.values()) for b in report["tracked_bytes"].values()) / 1024
+                print(f"Debug: Session memory - {report['sessions']} sessions, RSS {rss_mb:.1f} MB "
+                      f"({per_session_kb:.1f} KB/session above baseline), tracked {tracked_kb:.1f} KB")
+
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Key/value store shared by every app.py worker on this machine (see launcher.py).
+#
+# | namespace | value                       | written by                      |
+# |-----------|-----------------------------|---------------------------------|
+# | discovery | JSON voice / model lists    | startup, settings refresh       |
+# | tts       | raw audio bytes             | synthesize_speech               |
+# | sentiment | JSON classifier result      | lib/message_processor.py        |
+#
+# Backed by one SQLite file in WAL mode, so readers in other processes never
+# block on a writer. Entries expire after their TTL; once the total value size
+# exceeds max_bytes the oldest entries are deleted first.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    expires REAL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS cache_created ON cache (created);
+"""
+
+
+def cache_key(*parts) -> str:
+    """Hashes JSON-serializable parts into a fixed-length key."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+class SharedCache:
+    """
+    Cross-process cache on top of SQLite.
+
+    Args:
+        path: The SQLite file; created on first use.
+        max_bytes: Total value size kept before the oldest entries are pruned.
+        prune_every: Number of writes between size checks.
+    """
+
+    def __init__(self, path: str, max_bytes: int = 256 * 2**20, prune_every: int = 100):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.prune_every = prune_every
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection per process, shared by the event loop and to_thread workers
+        self._conn = sqlite3.connect(path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        self._writes = 0
+        # namespace -> {"hits": n, "misses": n, "writes": n}
+        self._stats = {}
+
+    def _count(self, namespace: str, field: str):
+        stats = self._stats.setdefault(namespace, {"hits": 0, "misses": 0, "writes": 0})
+        stats[field] += 1
+
+    def get(self, namespace: str, key: str):
+        """
+        Looks up a value.
+
+        Returns:
+            The stored bytes, or None when missing or expired.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            hit = row is not None and (row[1] is None or row[1] >= time.time())
+            # Counted under the lock: to_thread callers share this object
+            self._count(namespace, "hits" if hit else "misses")
+        return bytes(row[0]) if hit else None
+
+    def set(self, namespace: str, key: str, value: bytes, ttl_s: float = None):
+        """
+        Stores a value, replacing any previous one.
+
+        Args:
+            namespace: One of the namespaces above.
+            key: The entry key, e.g. from `cache_key()`.
+            value: The bytes to store.
+            ttl_s: Seconds until the entry expires; None keeps it until pruned.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (namespace, key, value, size, created, expires) VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, sqlite3.Binary(value), len(value), now, now + ttl_s if ttl_s is not None else None),
+            )
+            self._count(namespace, "writes")
+            self._writes += 1
+            prune = self._writes % self.prune_every == 0
+        if prune:
+            self.prune()
+
+    def get_json(self, namespace: str, key: str):
+        value = self.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, namespace: str, key: str, value, ttl_s: float = None):
+        self.set(namespace, key, json.dumps(value).encode("utf-8"), ttl_s)
+
+    async def aget(self, namespace: str, key: str):
+        """`get()` off the event loop."""
+        return await asyncio.to_thread(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: bytes, ttl_s: float = None):
+        """`set()` off the event loop."""
+        await asyncio.to_thread(self.set, namespace, key, value, ttl_s)
+
+    def prune(self):
+        """Deletes expired entries, then the oldest ones until the store fits in max_bytes."""
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires < ?", (time.time(),))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            excess = total - self.max_bytes
+            freed = 0
+            stale = []
+            for namespace, key, size in self._conn.execute("SELECT namespace, key, size FROM cache ORDER BY created"):
+                stale.append((namespace, key))
+                freed += size
+                if freed >= excess:
+                    break
+            self._conn.executemany("DELETE FROM cache WHERE namespace = ? AND key = ?", stale)
+        print(f"Debug: Shared cache pruned {len(stale)} entries ({freed / 2**20:.1f} MB)")
+
+    def report(self) -> dict:
+        """
+        Per-namespace hit rates for this process, plus the size of the shared store.
+
+        Returns:
+            Example: {"entries": 120, "size_mb": 14.2, "namespaces": {"tts": {"hits": 9, "misses": 3, "writes": 3, "hit_rate": 0.75}}}
+        """
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        namespaces = {}
+        for namespace, stats in self._stats.items():
+            lookups = stats["hits"] + stats["misses"]
+            namespaces[namespace] = {**stats, "hit_rate": stats["hits"] / lookups if lookups else None}
+        return {"entries": entries, "size_mb": size / 2**20, "namespaces": namespaces}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,137 @@
+import asyncio
+import re
+import time
+
+# Speculative LLM generation while the user is still speaking.
+#
+# While a recording streams in, app.py periodically transcribes the audio
+# received so far. Each new partial transcript starts a cancellable LLM request
+# (replacing the previous one). When the recording ends, the final transcript
+# is compared with the text the current speculation was started from:
+#
+# - same text and same request settings -> the speculative result is kept and
+#   the head start is counted as latency saved;
+# - anything else -> the speculation is cancelled and counted as wasted.
+#
+# Transcripts are compared after normalization (case, punctuation, spacing),
+# since Whisper often re-punctuates the same words once more audio arrives;
+# the rest of the request (model, prompt, sampler settings) must match exactly.
+
+
+def normalize_transcript(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9' ]", " ", text.lower()).split())
+
+
+def request_settings(request: dict) -> dict:
+    """The request without the user's text, which is compared separately through `normalize_transcript`."""
+    messages = [{**m, "content": None} if m.get("role") == "user" else m for m in request.get("messages", [])]
+    return {**request, "messages": messages}
+
+
+class Speculator:
+    """
+    Starts, resolves and measures speculative LLM requests.
+
+    Args:
+        min_new_audio_s: Seconds of new audio required before another partial transcription.
+        sample_rate: PCM sample rate of the mic audio.
+        sample_width: Bytes per PCM sample.
+    """
+
+    def __init__(self, min_new_audio_s: float = 1.5, sample_rate: int = 24000, sample_width: int = 2):
+        self.min_new_audio_bytes = int(min_new_audio_s * sample_rate * sample_width)
+        self.stats = {
+            "partial_stt_calls": 0,
+            "started": 0,
+            "kept": 0,
+            "discarded": 0,
+            "wasted_tokens": 0,
+            "wasted_llm_s": 0.0,
+            "saved_s": 0.0,
+        }
+
+    def start(self, text: str, request: dict, create_fn) -> dict:
+        """
+        Starts a speculative LLM request for a partial transcript.
+
+        Args:
+            text: The partial transcript.
+            request: The chat completion kwargs built from it.
+            create_fn: The coroutine function to call, e.g. `client.chat.completions.create`.
+
+        Returns:
+            The speculation handle to pass to `resolve()` or `discard()`.
+        """
+        self.stats["started"] += 1
+        speculation = {
+            "text": normalize_transcript(text),
+            "settings": request_settings(request),
+            "task": asyncio.create_task(create_fn(**request)),
+            "started": time.perf_counter(),
+            "finished": None,
+        }
+        speculation["task"].add_done_callback(lambda t: speculation.__setitem__("finished", time.perf_counter()))
+        return speculation
+
+    def matches(self, speculation: dict, text: str) -> bool:
+        return speculation is not None and speculation["text"] == normalize_transcript(text)
+
+    def resolve(self, speculation: dict, final_text: str, request: dict):
+        """
+        Keeps or discards a speculation once the final transcript is known.
+
+        Args:
+            speculation: The handle from `start()`, or None.
+            final_text: The final transcript.
+            request: The chat completion kwargs built from the final transcript.
+
+        Returns:
+            The speculative task to await if it was kept, otherwise None.
+        """
+        if speculation is None:
+            return None
+        if speculation["text"] != normalize_transcript(final_text) or speculation["settings"] != request_settings(request):
+            self.discard(speculation)
+            return None
+        task = speculation["task"]
+        if task.done() and (task.cancelled() or task.exception() is not None):
+            self.discard(speculation)
+            return None
+        self.stats["kept"] += 1
+        # Latency saved: the head start, capped at the request's own duration if it already finished
+        speculation["saved_s"] = (speculation["finished"] or time.perf_counter()) - speculation["started"]
+        self.stats["saved_s"] += speculation["saved_s"]
+        return task
+
+    def fail(self, speculation: dict):
+        """Counts a kept speculation whose task then failed as discarded instead."""
+        self.stats["kept"] -= 1
+        self.stats["saved_s"] -= speculation.pop("saved_s", 0.0)
+        self.discard(speculation)
+
+    def discard(self, speculation: dict):
+        """Cancels a speculation that will not be used and counts what it cost."""
+        if speculation is None:
+            return
+        task = speculation["task"]
+        self.stats["discarded"] += 1
+        self.stats["wasted_llm_s"] += (speculation["finished"] or time.perf_counter()) - speculation["started"]
+        if task.done():
+            if not task.cancelled() and task.exception() is None:
+                usage = getattr(task.result(), "usage", None)
+                self.stats["wasted_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        else:
+            task.cancel()
+
+    def report(self) -> dict:
+        """
+        Summarizes whether speculation pays off.
+
+        Returns:
+            The raw counters plus "hit_rate" and "saved_per_kept_s".
+        """
+        report = dict(self.stats)
+        resolved = self.stats["kept"] + self.stats["discarded"]
+        report["hit_rate"] = self.stats["kept"] / resolved if resolved else None
+        report["saved_per_kept_s"] = self.stats["saved_s"] / self.stats["kept"] if self.stats["kept"] else None
+        return report
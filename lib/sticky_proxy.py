@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import re
+
+# Sticky HTTP/websocket front proxy for several app.py workers (see launcher.py).
+#
+# Chainlit keeps each chat session (user_session, socket.io connection, uploaded
+# files) in the memory of the worker that created it, so every request of one
+# browser must reach the same worker:
+#
+# - a request carrying the STICKY_COOKIE goes to the worker it names;
+# - any other request is assigned round-robin, and the first response on that
+#   connection sets the cookie.
+#
+# After the request head is routed, bytes are piped through unchanged in both
+# directions, so websocket upgrades and keep-alive connections just work; a
+# keep-alive connection stays on its first worker. Clients without a cookie
+# jar (e.g. docs/testing/load_test.py) should use the websocket transport,
+# which is a single connection and therefore sticky by construction.
+
+STICKY_COOKIE = "chainloot_worker"
+MAX_HEAD_BYTES = 64 * 1024
+COOKIE_RE = re.compile(rb"^cookie:.*?\b" + STICKY_COOKIE.encode() + rb"=(\d+)", re.IGNORECASE | re.MULTILINE)
+
+
+class StickyProxy:
+    """
+    Routes connections to workers by sticky cookie.
+
+    Args:
+        backends: (host, port) of each worker, indexed by worker id.
+    """
+
+    def __init__(self, backends: list[tuple[str, int]]):
+        self.backends = backends
+        self._next = itertools.cycle(range(len(backends)))
+        self.connections = [0] * len(backends)
+        self.assigned = [0] * len(backends)
+
+    def route(self, head: bytes) -> tuple[int, bool]:
+        """
+        Picks the worker for a request head.
+
+        Returns:
+            (worker index, whether the worker was newly assigned and the cookie must be set).
+        """
+        match = COOKIE_RE.search(head)
+        if match and int(match.group(1)) < len(self.backends):
+            return int(match.group(1)), False
+        worker = next(self._next)
+        self.assigned[worker] += 1
+        return worker, True
+
+    async def handle(self, client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        upstream_writer = None
+        worker = None
+        try:
+            try:
+                head = await client_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            worker, new = self.route(head)
+            self.connections[worker] += 1
+            upstream_reader, upstream_writer = await asyncio.open_connection(*self.backends[worker])
+            upstream_writer.write(head)
+            await upstream_writer.drain()
+
+            to_upstream = asyncio.create_task(_pipe(client_reader, upstream_writer))
+            to_client = asyncio.create_task(self._respond(upstream_reader, client_writer, worker if new else None))
+            done, pending = await asyncio.wait({to_upstream, to_client}, return_when=asyncio.FIRST_COMPLETED)
+            # The client may half-close after sending; keep streaming the response
+            if to_upstream in done and not to_client.done():
+                await to_client
+            for task in pending:
+                task.cancel()
+        except OSError as e:
+            print(f"Proxy error for worker {worker}: {e}")
+        finally:
+            if worker is not None:
+                self.connections[worker] -= 1
+            for writer in (upstream_writer, client_writer):
+                if writer is not None:
+                    writer.close()
+
+    async def _respond(self, upstream_reader, client_writer, set_cookie_worker):
+        if set_cookie_worker is not None:
+            try:
+                head = await upstream_reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+                return
+            cookie = f"Set-Cookie: {STICKY_COOKIE}={set_cookie_worker}; Path=/; HttpOnly; SameSite=Lax\r\n".encode()
+            client_writer.write(head[:-2] + cookie + b"\r\n")
+        await _pipe(upstream_reader, client_writer)
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEAD_BYTES)
+        async with server:
+            await server.serve_forever()
+
+
+async def _pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+    except (ConnectionError, asyncio.CancelledError):
+        pass
+    finally:
+        if writer.can_write_eof():
+            try:
+                writer.write_eof()
+            except OSError:
+                pass
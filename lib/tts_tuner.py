@@ -0,0 +1,133 @@
+import math
+import time
+
+# Adaptive Chatterbox chunking driven by measured time-to-first-audio.
+#
+# config.json fixes tts_desired_length / tts_max_length / tts_max_new_tokens /
+# tts_chunked and params_dict always sent halve_first_chunk. The tuner keeps
+# those values as the upper bounds and adjusts each request within them:
+#
+# - short replies (<= desired_length chars) are sent unchunked;
+# - a deep TTS queue (many requests in flight) halves the first chunk and
+#   shrinks desired_length so the first audio of every reply comes back sooner;
+# - an EWMA of time-to-first-byte above the target shrinks desired_length one
+#   step, well below the target grows it back towards the configured value.
+#
+# For chunked requests max_length and max_new_tokens keep their configured
+# ratio to desired_length; unchunked requests get the configured values, since
+# they bound the whole reply rather than one chunk.
+#
+# Only requests a user is waiting on should go through the tuner: background
+# synthesis (voice warm-up, filler clips) would skew both the queue depth and
+# the time-to-first-byte average.
+
+
+class TTSTuner:
+    """
+    Picks per-request TTS chunking params from recent time-to-first-byte and queue depth.
+
+    Args:
+        base_params: The configured Chatterbox params (upper bounds).
+        target_ttfb_s: Time-to-first-byte the controller steers towards.
+        min_desired_length: Lower bound for desired_length.
+        deep_queue: In-flight requests at which the queue counts as deep.
+        step: How much desired_length moves per adjustment.
+        alpha: EWMA smoothing factor for time-to-first-byte.
+    """
+
+    def __init__(self, base_params: dict, target_ttfb_s: float = 1.0, min_desired_length: int = 40,
+                 deep_queue: int = 2, step: int = 10, alpha: float = 0.3):
+        self.max_desired_length = base_params["desired_length"]
+        self.max_length = base_params["max_length"]
+        self.max_new_tokens = base_params["max_new_tokens"]
+        self.chunked = base_params["chunked"]
+        self.target_ttfb_s = target_ttfb_s
+        self.min_desired_length = min(min_desired_length, self.max_desired_length)
+        self.deep_queue = deep_queue
+        self.step = step
+        self.alpha = alpha
+        self.desired_length = self.max_desired_length
+        self.ttfb_ewma = None
+        self.in_flight = 0
+        # desired_length -> [count, total_ttfb, total_time]; used to verify the decisions pay off
+        self._by_length = {}
+
+    def begin(self, text: str) -> dict:
+        """
+        Chooses chunking params for one request and marks it in flight.
+
+        Args:
+            text: The text about to be synthesized.
+
+        Returns:
+            A decision dict; pass its "params" into the request and the dict itself to `finish()`.
+        """
+        queue_depth = self.in_flight
+        self.in_flight += 1
+        desired_length = self.desired_length
+        deep = queue_depth >= self.deep_queue
+        if deep:
+            desired_length = max(self.min_desired_length, desired_length // 2)
+        chunked = self.chunked and len(text) > desired_length
+        ratio = desired_length / self.max_desired_length if chunked else 1.0
+        params = {
+            "chunked": chunked,
+            "desired_length": desired_length,
+            "max_length": max(desired_length, math.ceil(self.max_length * ratio)),
+            "max_new_tokens": max(1, math.ceil(self.max_new_tokens * ratio)),
+            # Halving only helps when there is more than one chunk
+            "halve_first_chunk": chunked and (deep or len(text) > 2 * desired_length),
+        }
+        reason = "deep queue" if deep else ("steady" if chunked else ("short reply" if self.chunked else "chunking off"))
+        print(f"Debug: TTS tuning - {len(text)} chars, queue {queue_depth}, "
+              f"ttfb ewma {self._fmt(self.ttfb_ewma)}, {reason} -> {params}")
+        return {"params": params, "queue_depth": queue_depth, "started": time.perf_counter()}
+
+    def finish(self, decision: dict, ttfb_s: float = None, total_s: float = None):
+        """
+        Records the outcome of a request started with `begin()` and adapts desired_length.
+
+        Args:
+            decision: The dict returned by `begin()`.
+            ttfb_s: Seconds until the first audio byte, or None if the request failed.
+            total_s: Seconds until the last audio byte.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if ttfb_s is None:
+            return
+        length = decision["params"]["desired_length"]
+        stats = self._by_length.setdefault(length, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += ttfb_s
+        stats[2] += total_s or 0.0
+
+        self.ttfb_ewma = ttfb_s if self.ttfb_ewma is None else self.alpha * ttfb_s + (1 - self.alpha) * self.ttfb_ewma
+        previous = self.desired_length
+        if self.ttfb_ewma > self.target_ttfb_s:
+            self.desired_length = max(self.min_desired_length, self.desired_length - self.step)
+        elif self.ttfb_ewma < self.target_ttfb_s / 2:
+            self.desired_length = min(self.max_desired_length, self.desired_length + self.step)
+        if self.desired_length != previous:
+            print(f"Debug: TTS tuning - ttfb ewma {self._fmt(self.ttfb_ewma)} vs target {self.target_ttfb_s:.2f}s, "
+                  f"desired_length {previous} -> {self.desired_length}")
+
+    def report(self) -> dict:
+        """
+        Summarizes measured latency per desired_length, to check the controller helps.
+
+        Returns:
+            Example: {"desired_length": 80, "ttfb_ewma": 0.9, "by_length": {100: {"count": 4, "ttfb_avg": 1.4, "total_avg": 3.1}}}
+        """
+        return {
+            "desired_length": self.desired_length,
+            "ttfb_ewma": self.ttfb_ewma,
+            "in_flight": self.in_flight,
+            "by_length": {
+                length: {"count": count, "ttfb_avg": ttfb / count, "total_avg": total / count}
+                for length, (count, ttfb, total) in sorted(self._by_length.items())
+            },
+        }
+
+    @staticmethod
+    def _fmt(seconds):
+        return "n/a" if seconds is None else f"{seconds:.2f}s"
@@ -0,0 +1,182 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+
+# Opt-in recorder for reproducing slow turns offline.
+#
+# Each session appends to <directory>/<session_id>.turns. The file starts with
+# MAGIC followed by length-prefixed segments:
+#
+# | field   | type | notes                                      |
+# |---------|------|--------------------------------------------|
+# | kind    | u8   | one of the SEGMENT_* constants below       |
+# | t       | f64  | seconds since the turn started             |
+# | length  | u32  | payload length in bytes                    |
+# | payload | -    | raw bytes (audio) or UTF-8 JSON (the rest) |
+#
+# Audio payloads are stored raw so the reader can hand them out as zero-copy
+# memoryviews over an mmap of the file. A turn is written in one append when it
+# finishes, so a crash mid-turn never leaves a partial turn behind.
+
+MAGIC = b"CLTURNS1"
+HEADER = struct.Struct("<BdI")
+
+SEGMENT_TURN_START = 1
+SEGMENT_MIC_PCM = 2
+SEGMENT_USER_TEXT = 3
+SEGMENT_STT_TEXT = 4
+SEGMENT_LLM_REQUEST = 5
+SEGMENT_LLM_RESPONSE = 6
+SEGMENT_TTS_AUDIO = 7
+SEGMENT_TURN_END = 8
+
+SEGMENT_NAMES = {
+    SEGMENT_TURN_START: "turn_start",
+    SEGMENT_MIC_PCM: "mic_pcm",
+    SEGMENT_USER_TEXT: "user_text",
+    SEGMENT_STT_TEXT: "stt_text",
+    SEGMENT_LLM_REQUEST: "llm_request",
+    SEGMENT_LLM_RESPONSE: "llm_response",
+    SEGMENT_TTS_AUDIO: "tts_audio",
+    SEGMENT_TURN_END: "turn_end",
+}
+BINARY_SEGMENTS = {SEGMENT_MIC_PCM, SEGMENT_TTS_AUDIO}
+
+
+class TurnRecording:
+    """One turn being recorded; segments are buffered until `finish()`."""
+
+    def __init__(self, path: str, meta: dict):
+        self.path = path
+        self.started = time.perf_counter()
+        self.segments = []
+        self.add(SEGMENT_TURN_START, {**meta, "wall_time": time.time()})
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def add(self, kind: int, payload):
+        """
+        Appends a segment stamped with the time since the turn started.
+
+        Args:
+            kind: One of the SEGMENT_* constants.
+            payload: Bytes for audio segments, a JSON-serializable value otherwise.
+        """
+        if kind not in BINARY_SEGMENTS:
+            payload = json.dumps(payload, default=str).encode("utf-8")
+        self.segments.append((kind, self.elapsed(), bytes(payload)))
+
+    async def finish(self, timings: dict = None):
+        """Closes the turn and appends it to the session file off the event loop."""
+        self.add(SEGMENT_TURN_END, timings or {})
+        await asyncio.to_thread(self._write)
+
+    def _write(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            if f.tell() == 0:
+                f.write(MAGIC)
+            for kind, t, payload in self.segments:
+                f.write(HEADER.pack(kind, t, len(payload)))
+                f.write(payload)
+
+
+class TurnRecorder:
+    """
+    Creates per-session turn recordings.
+
+    Args:
+        directory: Where the .turns files are written.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def begin(self, session_id: str, meta: dict) -> TurnRecording:
+        return TurnRecording(os.path.join(self.directory, f"{session_id}.turns"), {"session_id": session_id, **meta})
+
+
+class TurnReader:
+    """
+    Reads a .turns file through mmap.
+
+    Usage:
+        with TurnReader(path) as reader:
+            for turn in reader.turns():
+                ...
+
+    Audio payloads are memoryviews into the mapping. Closing the reader while some of
+    them are still referenced is allowed: the mapping is then released once the last
+    view is dropped instead of at `close()`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._mmap = None
+
+    def __enter__(self):
+        self._file = open(self.path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a turn recording")
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # Payload views are still alive; the mapping goes away with the last of them
+                pass
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def segments(self):
+        """Yields (kind, t, payload) for every segment in file order."""
+        view = memoryview(self._mmap)
+        offset = len(MAGIC)
+        try:
+            while offset + HEADER.size <= len(view):
+                kind, t, length = HEADER.unpack_from(view, offset)
+                offset += HEADER.size
+                payload = view[offset:offset + length]
+                offset += length
+                if kind in BINARY_SEGMENTS:
+                    yield kind, t, payload
+                else:
+                    yield kind, t, json.loads(bytes(payload))
+        finally:
+            view.release()
+
+    def turns(self):
+        """
+        Groups segments into turns.
+
+        Yields:
+            Dicts like {"meta": {...}, "timings": {...}, "events": [(name, t, payload), ...]}.
+        """
+        turn = None
+        for kind, t, payload in self.segments():
+            if kind == SEGMENT_TURN_START:
+                turn = {"meta": payload, "timings": {}, "events": []}
+            elif turn is None:
+                continue
+            elif kind == SEGMENT_TURN_END:
+                turn["timings"] = payload
+                yield turn
+                turn = None
+            else:
+                turn["events"].append((SEGMENT_NAMES.get(kind, str(kind)), t, payload))
@@ -0,0 +1,98 @@
+import asyncio
+import time
+
+# Chatterbox derives speaker conditioning from the reference `tts_voice` clip on
+# every request unless `cache_voice` is set, and the first request after a
+# voice switch also pays the `use_compilation` cost. The warm-up manager fires
+# one throwaway synthesis per voice in the background, then lets later requests
+# reuse the cached conditioning.
+
+WARMUP_TEXT = "Hello."
+
+
+class VoiceWarmup:
+    """
+    Tracks which TTS voices are warm and records cold vs. warm TTS latency per voice.
+
+    The synthesize callable is expected to call `record()` for foreground
+    requests; the warm-up request records itself as a cold sample.
+
+    Args:
+        synthesize: Coroutine `(text, voice, speed, params, use_cache=..., tune=...) -> bytes` used for the
+            warm-up request; it is called with `use_cache=False` so a cached clip never stands in for a real
+            warm-up, and `tune=False` so its cold latency does not steer TTS chunking and is not recorded twice.
+        warmup_text: The short phrase synthesized to warm a voice.
+    """
+
+    def __init__(self, synthesize, warmup_text: str = WARMUP_TEXT):
+        self.synthesize = synthesize
+        self.warmup_text = warmup_text
+        self._warm = set()
+        self._tasks = {}
+        # voice -> {"cold": [count, total_seconds], "warm": [count, total_seconds]}
+        self._latency = {}
+
+    def is_warm(self, voice: str) -> bool:
+        return voice in self._warm
+
+    def warm(self, voice: str, speed: float, params: dict):
+        """
+        Schedules a background warm-up synthesis for `voice` unless it is warm or warming.
+
+        Args:
+            voice: The TTS voice to warm.
+            speed: The TTS speed.
+            params: The Chatterbox `params` payload; `cache_voice` is forced on.
+
+        Returns:
+            The warm-up task, or None if no warm-up was needed.
+        """
+        if voice in self._warm or voice in self._tasks:
+            return None
+        task = asyncio.create_task(self._run(voice, speed, {**params, "cache_voice": True}))
+        self._tasks[voice] = task
+        return task
+
+    async def _run(self, voice: str, speed: float, params: dict):
+        start = time.perf_counter()
+        try:
+            await self.synthesize(self.warmup_text, voice, speed, params, use_cache=False, tune=False)
+        except Exception as e:
+            print(f"Voice warm-up failed for {voice}: {e}")
+            return
+        finally:
+            self._tasks.pop(voice, None)
+        elapsed = time.perf_counter() - start
+        self.record(voice, elapsed, warm=False)
+        self._warm.add(voice)
+        print(f"Debug: Voice {voice} warm after {elapsed:.2f}s")
+
+    def invalidate(self, voice: str = None):
+        """Marks `voice` (or every voice) cold again, e.g. after a TTS server restart."""
+        if voice is None:
+            self._warm.clear()
+        else:
+            self._warm.discard(voice)
+
+    def record(self, voice: str, seconds: float, warm: bool):
+        """Records the latency of one TTS request for `voice`."""
+        stats = self._latency.setdefault(voice, {"cold": [0, 0.0], "warm": [0, 0.0]})
+        bucket = stats["warm" if warm else "cold"]
+        bucket[0] += 1
+        bucket[1] += seconds
+
+    def stats(self) -> dict:
+        """
+        Summarizes cold vs. warm TTS latency per voice.
+
+        Returns:
+            A dictionary keyed by voice.
+            Example: {"voices/a.wav": {"warm": True, "cold_count": 1, "cold_avg": 2.4, "warm_count": 5, "warm_avg": 0.8}}
+        """
+        summary = {}
+        for voice, stats in self._latency.items():
+            summary[voice] = {"warm": voice in self._warm}
+            for kind, (count, total) in stats.items():
+                summary[voice][f"{kind}_count"] = count
+                summary[voice][f"{kind}_avg"] = total / count if count else None
+        return summary